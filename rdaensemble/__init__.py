@@ -1,12 +1,22 @@
 # rdaensemble/__init__.py
 
-from .rmfrst import random_map, gen_rmfrst_ensemble
+from .rmfrst import (
+    random_map,
+    cut_strategies,
+    gen_rmfrst_ensemble,
+    gen_rmfrst_plans,
+    RandomMapJob,
+    random_map_jobs,
+    run_random_map_jobs,
+)
 from .rmfrsp import gen_rmfrsp_ensemble
 from .mcmc import (
     prep_data,
     setup_optimized_markov_chain,
     setup_unbiased_markov_chain,
     run_unbiased_chain,
+    load_checkpoint,
+    checkpoint_plan,
     run_optimized_chain,
     optimize_methods,
     simulated_annealing,
@@ -23,7 +33,25 @@ from .mcmc import (
 )
 from .general import (
     score_ensemble,
+    METRIC_FAMILIES,
+    CSVScoreStore,
+    ParquetScoreStore,
+    ScoreSink,
+    open_score_store,
+    read_parquet_scores,
+    read_parquet_columns,
+    is_parquet_scores,
+    ScoreCache,
+    DistrictCache,
+    analyze_plan_incrementally,
+    analyze_plan_families,
+    PlanIndex,
+    district_vector,
+    calc_energy_vector,
+    calc_energies,
     id_notable_maps,
+    id_notable_maps_from_ratings,
+    ratings_array,
     ratings_dimensions,
     ratings_indexes,
     better_map,
@@ -33,6 +61,30 @@ from .general import (
     scores_metadata,
     make_plan,
     plan_from_ensemble,
+    StateInputs,
+    load_state_inputs,
+    EnsembleReader,
+    PackedEnsembleReader,
+    EnsembleSource,
+    open_ensemble,
+    EnsembleWriter,
+    JSONEnsembleWriter,
+    JSONLinesEnsembleWriter,
+    EnsembleSink,
+    open_ensemble_writer,
+    read_ensemble,
+    stream_ensemble,
+    copy_ensemble,
+    pack_plans,
+    unpack_plans,
+    write_ensemble,
+    is_binary_ensemble,
+    is_lines_ensemble,
+    index_path,
+    EnsembleSummary,
+    summarize_ensemble,
+    check_geoids,
+    combine_ensembles,
 )
 
 name: str = "rdaensemble"
@@ -2,9 +2,28 @@
 
 from .score import (
     score_ensemble,
+    METRIC_FAMILIES,
 )
+from .score_store import (
+    CSVScoreStore,
+    ParquetScoreStore,
+    ScoreSink,
+    open_score_store,
+    read_parquet_scores,
+    read_parquet_columns,
+    is_parquet_scores,
+)
+from .score_cache import ScoreCache
+from .incremental import (
+    DistrictCache,
+    analyze_plan_incrementally,
+    analyze_plan_families,
+)
+from .vectors import PlanIndex, district_vector, calc_energy_vector, calc_energies
 from .notable_maps import (
     id_notable_maps,
+    id_notable_maps_from_ratings,
+    ratings_array,
     ratings_dimensions,
     ratings_indexes,
     better_map,
@@ -12,5 +31,32 @@ from .notable_maps import (
 )
 from .metautils import shared_metadata, ensemble_metadata, scores_metadata
 from .utils import make_plan, plan_from_ensemble
+from .inputs import StateInputs, load_state_inputs
+from .ensemble_io import (
+    EnsembleReader,
+    PackedEnsembleReader,
+    EnsembleSource,
+    open_ensemble,
+    EnsembleWriter,
+    JSONEnsembleWriter,
+    JSONLinesEnsembleWriter,
+    EnsembleSink,
+    open_ensemble_writer,
+    read_ensemble,
+    stream_ensemble,
+    copy_ensemble,
+    pack_plans,
+    unpack_plans,
+    write_ensemble,
+    is_binary_ensemble,
+    is_lines_ensemble,
+    index_path,
+)
+from .combine import (
+    EnsembleSummary,
+    summarize_ensemble,
+    check_geoids,
+    combine_ensembles,
+)
 
 name: str = "general"
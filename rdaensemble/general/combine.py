@@ -0,0 +1,140 @@
+"""
+COMBINE THE PLANS FROM MULTIPLE ENSEMBLES, A PLAN AT A TIME
+
+Each input is summarized first (its metadata, number of plans & GEOIDs), so the
+combined metadata can be written before the plans. Then the plans are streamed
+from each input to the output in turn, unpacking packed inputs on the fly.
+"""
+
+from typing import Any, List, Dict, NamedTuple
+
+import json
+
+from .ensemble_io import (
+    EnsembleReader,
+    JSONEnsembleStream,
+    is_binary_ensemble,
+    is_lines_ensemble,
+    read_lines_index,
+    stream_ensemble,
+    open_ensemble_writer,
+)
+
+SHARED_FIELDS: List[str] = [
+    "state",
+    "cycle",
+    "plan_type",
+    "units",
+    "ndistricts",
+]
+SOURCE_FIELDS: List[str] = [
+    "method",
+    "packed",
+    "username",
+    "date_created",
+    "time_created",
+    "repository",
+]
+
+
+class EnsembleSummary(NamedTuple):
+    path: str
+    metadata: Dict[str, Any]
+    size: int
+    geoids: List[str]  # Of the first plan, if any
+
+
+def summarize_ensemble(path: str) -> EnsembleSummary:
+    """The metadata, number of plans & GEOIDs of an ensemble, without loading its plans."""
+
+    if is_binary_ensemble(path):
+        reader: EnsembleReader = EnsembleReader(path)
+        return EnsembleSummary(path, reader.metadata, len(reader), reader.geoids)
+
+    # The first plan of a packed ensemble is a full plan, so it has every GEOID.
+    first: Dict[str, Any] = dict()
+    metadata: Dict[str, Any]
+    size: int = 0
+
+    if is_lines_ensemble(path):
+        size = len(read_lines_index(path).offsets)
+        with open(path, "r", encoding="utf-8") as f:
+            metadata = json.loads(f.readline())
+            if size > 0:
+                first = json.loads(f.readline())["plan"]
+    else:
+        stream: JSONEnsembleStream = JSONEnsembleStream(path)
+        metadata = stream.metadata
+        for plan in stream:
+            if size == 0:
+                first = plan["plan"]
+            size += 1
+
+    return EnsembleSummary(path, metadata, size, list(first.keys()))
+
+
+def combined_metadata(summaries: List[EnsembleSummary]) -> Dict[str, Any]:
+    """The metadata for the combined ensemble, with the provenance of each input."""
+
+    combined: Dict[str, Any] = dict()
+    combined["packed"] = False
+    combined["method"] = "Combining multiple independently generated ensembles"
+
+    # Keep the fields that the inputs which have them agree on
+    for field in SHARED_FIELDS:
+        values: List[Any] = [s.metadata[field] for s in summaries if field in s.metadata]
+        if values and all(v == values[0] for v in values):
+            combined[field] = values[0]
+
+    combined["size"] = sum(s.size for s in summaries)
+    combined["sources"] = [
+        {"path": s.path, "size": s.size}
+        | {k: s.metadata[k] for k in SOURCE_FIELDS if k in s.metadata}
+        for s in summaries
+    ]
+
+    return combined
+
+
+def check_geoids(summaries: List[EnsembleSummary]) -> None:
+    """Make sure the plans in every ensemble assign the same precincts."""
+
+    nonempty: List[EnsembleSummary] = [s for s in summaries if s.size > 0]
+    if not nonempty:
+        return
+
+    expected: set[str] = set(nonempty[0].geoids)
+    for s in nonempty[1:]:
+        if set(s.geoids) != expected:
+            raise ValueError(
+                f"The GEOIDs in {s.path} don't match those in {nonempty[0].path}."
+            )
+
+
+def combine_ensembles(
+    summaries: List[EnsembleSummary], output: str
+) -> Dict[str, Any]:
+    """Write the plans of several ensembles to one, a plan at a time.
+
+    Returns the metadata of the combined ensemble.
+    """
+
+    check_geoids(summaries)
+    metadata: Dict[str, Any] = combined_metadata(summaries)
+
+    geoids: set[str] = set(next((s.geoids for s in summaries if s.size > 0), []))
+
+    with open_ensemble_writer(output, metadata) as writer:
+        for s in summaries:
+            _, plans = stream_ensemble(s.path)
+            for plan in plans:
+                if plan["plan"].keys() != geoids:
+                    raise ValueError(
+                        f"Plan {plan['name']} in {s.path} doesn't assign the same precincts."
+                    )
+                writer.write(plan)
+
+    return metadata
+
+
+### END ###
@@ -0,0 +1,808 @@
+"""
+READ & WRITE ENSEMBLES, AS JSON OR IN A COLUMNAR BINARY FORMAT
+
+The binary format stores the GEOIDs once and each plan as a row of small-integer
+districts in one 2-D array, in the order of the GEOIDs:
+
+  - A 64-byte header: magic, the offset & length of the footer
+  - The districts, one row per plan (uint8 or uint16)
+  - A JSON footer: the ensemble metadata, the GEOIDs, the dtype, and
+    the plan names & weights
+
+Because the footer is written last, plans can be written one at a time. But a
+binary (or JSON) ensemble cut short by a crash can't be read, so long-running
+generators write JSON Lines and copy them to another format when they finish.
+
+Ensembles can also be streamed as JSON, or as JSON Lines (.jsonl): the metadata
+on the first line, then one plan per line. A JSON Lines ensemble cut short by a
+crash is still readable up to its last complete line.
+
+In a packed ensemble, each plan only records the districts that changed since
+the previous plan, except for periodic keyframes ("keyframe": true) that record
+every district. The first plan is always full. A JSON Lines ensemble has an
+offset index alongside it (<path>.index.json): the byte offset & name of each
+plan and which plans are keyframes. So any plan can be decoded by seeking to
+the nearest keyframe before it and replaying at most one keyframe interval.
+
+Ensembles can also be streamed, reading & (un)packing a plan at a time. A JSON
+ensemble is parsed incrementally, so its metadata must precede its plans, as it
+does in the ensembles written here.
+"""
+
+from typing import Any, List, Dict, Iterable, Iterator, Optional, NamedTuple, Tuple
+
+import os, re, json, struct
+from bisect import bisect_right
+
+import numpy as np
+
+from rdabase import read_json, write_json
+
+ENSEMBLE_EXT: str = ".ens"
+ENSEMBLE_LINES_EXT: str = ".jsonl"
+MAGIC: bytes = b"RDAENS01"
+HEADER_SIZE: int = 64
+
+
+def is_binary_ensemble(path: str) -> bool:
+    return path.endswith(ENSEMBLE_EXT)
+
+
+def is_lines_ensemble(path: str) -> bool:
+    return path.endswith(ENSEMBLE_LINES_EXT)
+
+
+def district_dtype(ndistricts: int) -> np.dtype:
+    """The smallest unsigned integer type that holds district ids 1 to N."""
+
+    if ndistricts <= np.iinfo(np.uint8).max:
+        return np.dtype(np.uint8)
+    if ndistricts <= np.iinfo(np.uint16).max:
+        return np.dtype(np.uint16)
+    raise ValueError(f"Too many districts ({ndistricts}) for a binary ensemble.")
+
+
+class EnsembleWriter:
+    """Write the plans of an ensemble to a binary ensemble file, one at a time."""
+
+    def __init__(
+        self,
+        path: str,
+        geoids: Optional[List[str]],  # If None, the GEOIDs of the first plan
+        metadata: Dict[str, Any],
+        *,
+        ndistricts: Optional[int] = None,
+        flush_every: int = 100,
+    ) -> None:
+        self.path: str = path
+        self.geoids: List[str] = list()
+        self.offset_by_geoid: Dict[str, int] = dict()
+        if geoids is not None:
+            self._set_geoids(list(geoids))
+        self.metadata: Dict[str, Any] = {
+            k: v for k, v in metadata.items() if k not in ["plans", "packed"]
+        }
+        self.ndistricts: int = int(ndistricts or metadata["ndistricts"])
+        self.dtype: np.dtype = district_dtype(self.ndistricts)
+        self.names: List[str] = list()
+        self.weights: List[Optional[float]] = list()
+        self.flush_every: int = flush_every
+
+        self._file = open(path, "wb")
+        self._file.write(bytes(HEADER_SIZE))
+
+    def _set_geoids(self, geoids: List[str]) -> None:
+        self.geoids = geoids
+        self.offset_by_geoid = {geoid: i for i, geoid in enumerate(geoids)}
+
+    def write(self, plan: Dict[str, Any]) -> None:
+        """Write a plan, i.e., a dict with a name, a plan dict & an optional weight."""
+
+        plan_dict: Dict[str, int | str] = plan["plan"]
+        if not self.geoids:
+            self._set_geoids(list(plan_dict.keys()))
+        if len(plan_dict) != len(self.geoids):
+            raise ValueError(
+                f"Plan {plan['name']} assigns {len(plan_dict)} of {len(self.geoids)} precincts."
+            )
+
+        row: np.ndarray = np.zeros(len(self.geoids), dtype=self.dtype)
+        row[[self.offset_by_geoid[geoid] for geoid in plan_dict]] = [
+            int(district) for district in plan_dict.values()
+        ]
+        if row.min() < 1 or row.max() > self.ndistricts:
+            raise ValueError(f"Plan {plan['name']} has districts outside 1 to N.")
+
+        self._file.write(row.tobytes())
+        self.names.append(str(plan["name"]))
+        self.weights.append(plan.get("weight"))
+        if len(self.names) % self.flush_every == 0:
+            self._file.flush()
+
+    def flush(self) -> None:
+        """Flush the plans written so far all the way to disk."""
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Write the footer & point the header at it."""
+
+        footer: Dict[str, Any] = {
+            "metadata": self.metadata,
+            "geoids": self.geoids,
+            "dtype": self.dtype.name,
+            "names": self.names,
+            "weights": self.weights if any(w is not None for w in self.weights) else None,
+        }
+        encoded: bytes = json.dumps(footer).encode("utf-8")
+
+        footer_offset: int = self._file.tell()
+        self._file.write(encoded)
+        self._file.seek(0)
+        self._file.write(MAGIC + struct.pack("<QQ", footer_offset, len(encoded)))
+        self._file.close()
+
+    def __enter__(self) -> "EnsembleWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class JSONEnsembleWriter:
+    """Write an ensemble to a JSON file, one plan at a time."""
+
+    def __init__(
+        self, path: str, metadata: Dict[str, Any], *, flush_every: int = 100
+    ) -> None:
+        self.nplans: int = 0
+        self.flush_every: int = flush_every
+
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("{\n")
+        for k, v in metadata.items():
+            if k != "plans":
+                self._file.write(f"    {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)},\n")
+        self._file.write('    "plans": [')
+
+    def write(self, plan: Dict[str, Any]) -> None:
+        self._file.write(",\n" if self.nplans > 0 else "\n")
+        self._file.write(f"        {json.dumps(plan, ensure_ascii=False)}")
+        self.nplans += 1
+        if self.nplans % self.flush_every == 0:
+            self._file.flush()
+
+    def flush(self) -> None:
+        """Flush the plans written so far all the way to disk."""
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.write("\n    ]\n}\n")
+        self._file.close()
+
+    def __enter__(self) -> "JSONEnsembleWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class JSONLinesEnsembleWriter:
+    """Write an ensemble to a JSON Lines file: the metadata, then a plan per line."""
+
+    def __init__(
+        self,
+        path: str,
+        metadata: Dict[str, Any],
+        *,
+        flush_every: int = 100,
+        append_after: Optional[int] = None,  # Keep this many existing plans & append
+    ) -> None:
+        self.path: str = path
+        self.nplans: int = 0
+        self.flush_every: int = flush_every
+
+        if append_after is not None:
+            index: LinesIndex = index_lines_ensemble(path)
+            if len(index.offsets) < append_after:
+                raise ValueError(f"{path} has fewer than {append_after} plans.")
+            self._index = truncate_lines_index(index, append_after)
+            os.truncate(path, self._index.size)
+            self.nplans = append_after
+            self._file = open(path, "a", encoding="utf-8")
+            return
+
+        self._file = open(path, "w", encoding="utf-8")
+        header: str = json.dumps(
+            {k: v for k, v in metadata.items() if k != "plans"}, ensure_ascii=False
+        )
+        self._file.write(header + "\n")
+        self._index = LinesIndex([], [], [], len(header.encode("utf-8")) + 1)
+
+    def write(self, plan: Dict[str, Any]) -> None:
+        line: str = json.dumps(plan, ensure_ascii=False) + "\n"
+        self._file.write(line)
+
+        if self.nplans == 0 or plan.get("keyframe", False):
+            self._index.keyframes.append(self.nplans)
+        self._index.offsets.append(self._index.size)
+        self._index.names.append(str(plan["name"]))
+        self._index = self._index._replace(
+            size=self._index.size + len(line.encode("utf-8"))
+        )
+
+        self.nplans += 1
+        if self.nplans % self.flush_every == 0:
+            self._file.flush()
+
+    def flush(self) -> None:
+        """Flush the plans written so far all the way to disk."""
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+        write_lines_index(self.path, self._index)
+
+    def __enter__(self) -> "JSONLinesEnsembleWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class LinesIndex(NamedTuple):
+    """The byte offset & name of each plan in a JSON Lines ensemble."""
+
+    offsets: List[int]
+    names: List[str]
+    keyframes: List[int]  # The plans that record every district
+    size: int  # The byte offset just past the last plan indexed
+
+
+PLAN_NAME: re.Pattern = re.compile(rb'^\{"name": ("(?:[^"\\]|\\.)*")')
+
+
+def index_path(path: str) -> str:
+    return f"{path}.index.json"
+
+
+def index_lines_ensemble(path: str) -> LinesIndex:
+    """Index a JSON Lines ensemble by reading it, ignoring a last line cut short."""
+
+    index: LinesIndex = LinesIndex([], [], [], 0)
+    offset: int = 0
+
+    with open(path, "rb") as f:
+        offset += len(f.readline())
+        for i, line in enumerate(f):
+            if not line.endswith(b"\n"):
+                break
+
+            # Only parse the lines that need it
+            match: Optional[re.Match] = PLAN_NAME.match(line)
+            name: str = (
+                json.loads(match.group(1)) if match else json.loads(line)["name"]
+            )
+            if i == 0 or (b'"keyframe"' in line and json.loads(line).get("keyframe")):
+                index.keyframes.append(i)
+
+            index.offsets.append(offset)
+            index.names.append(str(name))
+            offset += len(line)
+
+    return index._replace(size=offset)
+
+
+def truncate_lines_index(index: LinesIndex, nplans: int) -> LinesIndex:
+    """The index of just the first n plans."""
+
+    size: int = index.offsets[nplans] if nplans < len(index.offsets) else index.size
+
+    return LinesIndex(
+        index.offsets[:nplans],
+        index.names[:nplans],
+        [k for k in index.keyframes if k < nplans],
+        size,
+    )
+
+
+def read_lines_index(path: str) -> LinesIndex:
+    """Read the index of a JSON Lines ensemble, re-indexing it if it's stale."""
+
+    try:
+        with open(index_path(path), "r", encoding="utf-8") as f:
+            index: LinesIndex = LinesIndex(**json.load(f))
+        if index.size == os.path.getsize(path):
+            return index
+    except (OSError, ValueError, TypeError):
+        pass
+
+    return index_lines_ensemble(path)
+
+
+def write_lines_index(path: str, index: LinesIndex) -> None:
+    with open(index_path(path), "w", encoding="utf-8") as f:
+        json.dump(index._asdict(), f, ensure_ascii=False)
+
+
+EnsembleSink = EnsembleWriter | JSONEnsembleWriter | JSONLinesEnsembleWriter
+
+
+def open_ensemble_writer(
+    path: str, metadata: Dict[str, Any], *, flush_every: int = 100
+) -> EnsembleSink:
+    """Open a writer for an ensemble file, in the format implied by its extension."""
+
+    if is_binary_ensemble(path):
+        return EnsembleWriter(path, None, metadata, flush_every=flush_every)
+    if is_lines_ensemble(path):
+        return JSONLinesEnsembleWriter(path, metadata, flush_every=flush_every)
+
+    return JSONEnsembleWriter(path, metadata, flush_every=flush_every)
+
+
+class EnsembleReader:
+    """Read the plans in a binary ensemble file, memory-mapping the districts."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            header: bytes = f.read(HEADER_SIZE)
+            if header[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a binary ensemble.")
+            footer_offset, footer_length = struct.unpack_from("<QQ", header, len(MAGIC))
+            f.seek(footer_offset)
+            footer: Dict[str, Any] = json.loads(f.read(footer_length))
+
+        self.path: str = path
+        self.metadata: Dict[str, Any] = footer["metadata"]
+        self.geoids: List[str] = footer["geoids"]
+        self.names: List[str] = footer["names"]
+        self.weights: Optional[List[Optional[float]]] = footer["weights"]
+        self.offset_by_name: Dict[str, int] = {
+            name: i for i, name in enumerate(self.names)
+        }
+
+        shape = (len(self.names), len(self.geoids))
+        self.districts: np.ndarray = (
+            np.memmap(path, dtype=footer["dtype"], mode="r", offset=HEADER_SIZE, shape=shape)
+            if len(self.names) > 0
+            else np.zeros(shape, dtype=footer["dtype"])
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        """The i-th plan, in the same form as the plans in a JSON ensemble."""
+
+        plan: Dict[str, Any] = {"name": self.names[i]}
+        if self.weights is not None and self.weights[i] is not None:
+            plan["weight"] = self.weights[i]
+        plan["plan"] = dict(zip(self.geoids, self.districts[i].tolist()))
+
+        return plan
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.offset_by_name
+
+    def plan_item(self, name: str) -> Dict[str, Any]:
+        """The named plan, reading only its row of districts."""
+
+        if name not in self.offset_by_name:
+            raise ValueError(f"Plan {name} not found in ensemble")
+
+        return self[self.offset_by_name[name]]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def ensemble(self) -> Dict[str, Any]:
+        """The whole ensemble, as read_json() would return it."""
+
+        ensemble: Dict[str, Any] = dict(self.metadata)
+        ensemble["packed"] = False
+        ensemble["plans"] = list(self)
+
+        return ensemble
+
+
+class PackedEnsembleReader:
+    """Read the plans in a JSON or JSON Lines ensemble, packed or not.
+
+    A JSON Lines ensemble is read a plan at a time, using its offset index. A JSON
+    ensemble has no index, so it's loaded whole. Decoding a packed plan replays the deltas from the nearest keyframe before it
+    or, when reading forward, from the last plan decoded.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._file = None
+        self._plans: List[Dict[str, Any]] = list()
+
+        if is_lines_ensemble(path):
+            index: LinesIndex = read_lines_index(path)
+            self._file = open(path, "rb")
+            self.metadata: Dict[str, Any] = json.loads(self._file.readline())
+            self.names: List[str] = index.names
+            self.keyframes: List[int] = index.keyframes
+            self._offsets: List[int] = index.offsets
+        else:
+            ensemble: Dict[str, Any] = read_json(path)
+            self._plans = ensemble["plans"]
+            self.metadata = {k: v for k, v in ensemble.items() if k != "plans"}
+            self.names = [str(p["name"]) for p in self._plans]
+            self.keyframes = [
+                i for i, p in enumerate(self._plans) if i == 0 or p.get("keyframe")
+            ]
+
+        self.packed: bool = bool(self.metadata.get("packed", False))
+        self.offset_by_name: Dict[str, int] = {
+            name: i for i, name in enumerate(self.names)
+        }
+
+        # The last plan decoded, to read forward from
+        self._at: Optional[int] = None
+        self._districts: Dict[str, int | str] = dict()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        """The i-th plan, unpacked, in the same form as the plans in a JSON ensemble."""
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Plan {i} is out of range.")
+
+        item: Dict[str, Any] = self._item(i)
+        plan: Dict[str, Any] = {"name": item["name"]}
+        if "weight" in item:
+            plan["weight"] = item["weight"]
+        plan["plan"] = self._decode(i, item) if self.packed else item["plan"]
+
+        return plan
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.offset_by_name
+
+    def plan_item(self, name: str) -> Dict[str, Any]:
+        """The named plan, decoding only as much of the ensemble as it takes."""
+
+        if name not in self.offset_by_name:
+            raise ValueError(f"Plan {name} not found in ensemble")
+
+        return self[self.offset_by_name[name]]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def ensemble(self) -> Dict[str, Any]:
+        """The whole ensemble, unpacked, as read_json() would return it."""
+
+        ensemble: Dict[str, Any] = dict(self.metadata)
+        ensemble["packed"] = False
+        ensemble["plans"] = list(self)
+
+        return ensemble
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "PackedEnsembleReader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _item(self, i: int) -> Dict[str, Any]:
+        if self._file is None:
+            return self._plans[i]
+
+        self._file.seek(self._offsets[i])
+        return json.loads(self._file.readline())
+
+    def _decode(self, i: int, item: Dict[str, Any]) -> Dict[str, int | str]:
+        keyframe: int = self.keyframes[bisect_right(self.keyframes, i) - 1]
+
+        if keyframe == i:
+            self._districts = dict(item["plan"])
+        else:
+            start: int
+            if self._at is not None and keyframe <= self._at < i:
+                start = self._at + 1
+            else:
+                self._districts = dict(self._item(keyframe)["plan"])
+                start = keyframe + 1
+            for j in range(start, i):
+                self._districts.update(self._item(j)["plan"])
+            self._districts.update(item["plan"])
+
+        self._at = i
+
+        return dict(self._districts)
+
+
+EnsembleSource = EnsembleReader | PackedEnsembleReader
+
+
+def open_ensemble(path: str) -> EnsembleSource:
+    """Open an ensemble file for reading plans by position or name, without unpacking it."""
+
+    if is_binary_ensemble(path):
+        return EnsembleReader(path)
+
+    return PackedEnsembleReader(path)
+
+
+class JSONEnsembleStream:
+    """Parse a JSON ensemble incrementally: the metadata, then a plan at a time.
+
+    Only the plan being parsed (and a chunk of the file) is held in memory.
+    """
+
+    def __init__(self, path: str, *, chunk_size: int = 1 << 20) -> None:
+        self.path: str = path
+        self.chunk_size: int = chunk_size
+        self.metadata: Dict[str, Any] = dict()
+
+        self._file = open(path, "r", encoding="utf-8")
+        self._buffer: str = ""
+        self._pos: int = 0
+        self._eof: bool = False
+        self._decoder: json.JSONDecoder = json.JSONDecoder()
+        self._has_plans: bool = False
+
+        self._expect("{")
+        while self._peek() not in ["}", ""]:
+            key: str = self._value()
+            self._expect(":")
+            if key == "plans":
+                self._expect("[")
+                self._has_plans = True
+                break
+            self.metadata[key] = self._value()
+            if self._peek() == ",":
+                self._pos += 1
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self._has_plans and self._peek() != "]":
+            while True:
+                yield self._value()
+                if self._peek() != ",":
+                    break
+                self._pos += 1
+        if self._has_plans:
+            self._expect("]")
+            if self._peek() == ",":
+                raise ValueError(
+                    f"The metadata in {self.path} must precede the plans to stream it."
+                )
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _fill(self) -> bool:
+        """Read another chunk of the file, dropping what's been parsed."""
+
+        if self._eof:
+            return False
+
+        # Read at least as much as is pending, so a large plan takes few retries
+        chunk: str = self._file.read(
+            max(self.chunk_size, len(self._buffer) - self._pos)
+        )
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+
+        return True
+
+    def _peek(self) -> str:
+        """The next non-whitespace character, or "" at the end of the file."""
+
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos : self._pos + 1]
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at this point in {self.path}.")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        """Decode the next JSON value, reading more of the file until it's complete."""
+
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A number cut off at the end of the buffer may continue in the next chunk.
+                if (
+                    end < len(self._buffer) and self._buffer[end] not in "0123456789.eE+-"
+                ) or not self._fill():
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+
+def stream_ensemble(
+    path: str, *, unpack: bool = True
+) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """The metadata of an ensemble & an iterator over its plans, read a plan at a time.
+
+    By default, the plans of a packed ensemble are unpacked as they're read.
+    """
+
+    metadata: Dict[str, Any]
+    plans: Iterator[Dict[str, Any]]
+
+    if is_binary_ensemble(path):
+        reader: EnsembleReader = EnsembleReader(path)
+        metadata = dict(reader.metadata)
+        plans = iter(reader)
+    elif is_lines_ensemble(path):
+        with open(path, "r", encoding="utf-8") as f:
+            metadata = json.loads(f.readline())
+        plans = iter_lines_plans(path)
+    else:
+        stream: JSONEnsembleStream = JSONEnsembleStream(path)
+        metadata = stream.metadata
+        plans = iter(stream)
+
+    if unpack and metadata.get("packed", False):
+        metadata = dict(metadata)
+        metadata["packed"] = False
+        plans = unpack_plans(plans)
+
+    return metadata, plans
+
+
+def copy_ensemble(source: str, output: str) -> Dict[str, Any]:
+    """Copy an ensemble to another format, a plan at a time, without unpacking it.
+
+    Returns the metadata of the ensemble.
+    """
+
+    metadata: Dict[str, Any]
+    plans: Iterator[Dict[str, Any]]
+    metadata, plans = stream_ensemble(source, unpack=False)
+
+    with open_ensemble_writer(output, metadata) as writer:
+        for plan in plans:
+            writer.write(plan)
+
+    return metadata
+
+
+def iter_lines_plans(path: str) -> Iterator[Dict[str, Any]]:
+    """The plans in a JSON Lines ensemble, ignoring a last line cut short by a crash."""
+
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            yield json.loads(line)
+
+
+def pack_plans(
+    plans: Iterable[Dict[str, Any]], *, keyframe_every: int = 100
+) -> Iterator[Dict[str, Any]]:
+    """Pack a sequence of plans: the districts that changed, or every n-th plan in full.
+
+    NOTE - Packing depends on successive plans being mutations of previous plans!
+    """
+
+    prev: Dict[str, int | str] = dict()
+
+    for i, plan in enumerate(plans):
+        districts: Dict[str, int | str] = plan["plan"]
+        keyframe: bool = i % keyframe_every == 0
+
+        packed: Dict[str, Any] = {"name": plan["name"]}
+        if plan.get("weight") is not None:
+            packed["weight"] = plan["weight"]
+        packed["plan"] = (
+            districts
+            if keyframe
+            else {k: v for k, v in districts.items() if v != prev[k]}
+        )  # Assumes that the set of keys are the same
+        if keyframe:
+            packed["keyframe"] = True
+
+        yield packed
+        prev = districts
+
+
+def unpack_plans(plans: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Unpack a sequence of packed plans, replaying the deltas in order."""
+
+    districts: Dict[str, int | str] = dict()
+
+    for plan in plans:
+        # The first plan (and any keyframe) is a full plan, so it replaces every district.
+        districts.update(plan["plan"])
+
+        unpacked: Dict[str, Any] = {"name": plan["name"]}
+        if plan.get("weight") is not None:
+            unpacked["weight"] = plan["weight"]
+        unpacked["plan"] = dict(districts)
+
+        yield unpacked
+
+
+def read_ensemble(path: str) -> Dict[str, Any]:
+    """Read an ensemble from a JSON, JSON Lines (.jsonl) or binary (.ens) file."""
+
+    if is_binary_ensemble(path):
+        return EnsembleReader(path).ensemble()
+    if is_lines_ensemble(path):
+        return read_lines_ensemble(path)
+
+    return read_json(path)
+
+
+def read_lines_ensemble(path: str) -> Dict[str, Any]:
+    """Read a JSON Lines ensemble, ignoring a last line cut short by a crash."""
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines: List[str] = f.readlines()
+
+    ensemble: Dict[str, Any] = json.loads(lines[0])
+    plans: List[Dict[str, Any]] = list()
+    for i, line in enumerate(lines[1:], 1):
+        try:
+            plans.append(json.loads(line))
+        except json.JSONDecodeError:
+            if i < len(lines) - 1:
+                raise
+    ensemble["plans"] = plans
+
+    return ensemble
+
+
+def write_ensemble(path: str, ensemble: Dict[str, Any]) -> None:
+    """Write an ensemble to a JSON, JSON Lines (.jsonl) or binary (.ens) file."""
+
+    if is_lines_ensemble(path):
+        with JSONLinesEnsembleWriter(path, ensemble) as writer:
+            for plan in ensemble["plans"]:
+                writer.write(plan)
+        return
+
+    if not is_binary_ensemble(path):
+        write_json(path, ensemble)
+        return
+
+    if ensemble.get("packed", False):
+        raise ValueError("Packed ensembles can only be written as JSON.")
+
+    plans: List[Dict[str, Any]] = ensemble["plans"]
+    geoids: List[str] = list(plans[0]["plan"].keys()) if plans else []
+    ndistricts: int = int(ensemble.get("ndistricts", 0)) or max(
+        (int(d) for p in plans for d in p["plan"].values()), default=1
+    )
+
+    with EnsembleWriter(path, geoids, ensemble, ndistricts=ndistricts) as writer:
+        for plan in plans:
+            writer.write(plan)
+
+
+### END ###
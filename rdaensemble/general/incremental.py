@@ -0,0 +1,450 @@
+"""
+SCORE PLANS INCREMENTALLY, REUSING PER-DISTRICT RESULTS
+
+Successive ReCom plans differ in just two districts. Everything analyze_plan()
+computes district by district -- the census & election aggregates, the county
+populations, the area, perimeter & exterior (and so the diameter), the spanning
+tree score, and the cut edges -- only depends on the set of precincts in the
+district. So those intermediate results are cached, keyed by a hash of the
+district's GEOIDs, and only new districts are computed before the plan-level
+scores are assembled as analyze_plan(which="all") assembles them.
+
+Without the compactness metrics, the shapes aren't touched at all.
+
+Scoring just some of the metric families without the cache uses the same
+assembly, so the districts are aggregated once for all the families selected.
+"""
+
+from typing import Any, List, Dict, NamedTuple, Optional, Collection
+
+import hashlib
+from collections import defaultdict, OrderedDict
+
+from rdabase import (
+    census_fields,
+    election_fields,
+    GeoID,
+    OUT_OF_STATE,
+    Assignment,
+)
+from rdascore import (
+    calc_population_deviation,
+    calc_partisan_metrics,
+    calc_minority_metrics,
+    calc_compactness_metrics,
+    calc_splitting_metrics,
+    calc_spanning_tree_score,
+)
+from rdascore.analyze import (
+    calc_alt_minority_metrics,
+    rate_proportionality,
+    rate_competitiveness,
+    rate_minority_opportunity,
+    rate_compactness,
+    rate_splitting,
+)
+from rdascore.smallestenclosingcircle import wl_make_circle
+
+total_pop_field: str = census_fields[0]
+rep_votes_field: str = election_fields[1]
+dem_votes_field: str = election_fields[2]
+
+# The metric families that analyze_plan() can compute separately, in scorecard order
+ANALYZE_FAMILIES: List[str] = ["partisan", "minority", "compactness", "splitting"]
+
+int_metrics: List[str] = [
+    "pr_seats",
+    "proportional_opportunities",
+    "proportional_coalitions",
+    "proportionality",
+    "competitiveness",
+    "minority",
+    "minority_alt",
+    "compactness",
+    "splitting",
+]
+
+
+class DistrictResults(NamedTuple):
+    """The intermediate results for a district that only depend on its precincts."""
+
+    pop: int
+    d_votes: int
+    tot_votes: int  # Two-party
+    demos: Dict[str, int]
+    pop_by_county: Dict[str, int]
+    area: float
+    perimeter: float
+    diameter: float
+    spanning_tree_score: float
+    cut_edges: int  # Edges to precincts in other districts
+
+
+def district_key(geoids: List[str]) -> bytes:
+    """A hash of the set of precincts in a district."""
+
+    return hashlib.blake2b(
+        "\n".join(sorted(geoids)).encode(), digest_size=16
+    ).digest()
+
+
+class DistrictCache:
+    """The results for the districts seen most recently, up to a maximum number."""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._results: OrderedDict[bytes, DistrictResults] = OrderedDict()
+
+    def get(self, key: bytes) -> Optional[DistrictResults]:
+        results: Optional[DistrictResults] = self._results.get(key)
+        if results is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._results.move_to_end(key)
+
+        return results
+
+    def put(self, key: bytes, results: DistrictResults) -> None:
+        self._results[key] = results
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+def analyze_district(
+    geoids: List[str],
+    data: Dict[str, Dict[str, str | int]],
+    shapes: Dict[str, Any],
+    graph: Dict[str, List[str]],
+    compactness: bool = True,  # If False, skip the geometry
+) -> DistrictResults:
+    """Compute the intermediate results for a district, as analyze_plan() does."""
+
+    members: set[str] = set(geoids)
+
+    pop: int = 0
+    d_votes: int = 0
+    tot_votes: int = 0
+    demos: Dict[str, int] = defaultdict(int)
+    pop_by_county: Dict[str, int] = defaultdict(int)
+
+    area: float = 0.0
+    perimeter: float = 0.0
+    exterior: List = list()
+    cut_edges: int = 0
+    subgraph: Dict[str, List[str]] = dict()
+
+    for geoid in geoids:
+        row: Dict[str, str | int] = data[geoid]
+
+        p: int = int(row[total_pop_field])
+        pop += p
+        d_votes += int(row[dem_votes_field])
+        tot_votes += int(row[dem_votes_field]) + int(row[rep_votes_field])
+        for demo in census_fields[1:]:  # Everything except total population
+            demos[demo] += int(row[demo])
+        pop_by_county[GeoID(geoid).county[2:]] += p
+
+        if not compactness:
+            continue
+
+        # The border with other districts or the state border
+        shape: Dict[str, Any] = shapes[geoid]
+        area += shape["area"]
+        for n in graph[geoid]:
+            if n == OUT_OF_STATE:
+                if OUT_OF_STATE in shape["arcs"]:
+                    perimeter += shape["arcs"][n]
+                    exterior.extend(shape["exterior"])
+            elif n not in members:
+                perimeter += shape["arcs"][n]
+                exterior.extend(shape["exterior"])
+                cut_edges += 1
+
+        subgraph[geoid] = [n for n in graph[geoid] if n in members]
+
+    r: float = 0.0
+    spanning_tree_score: float = 0.0
+    if compactness:
+        _, _, r = wl_make_circle(exterior)
+        spanning_tree_score = calc_spanning_tree_score(subgraph)
+
+    return DistrictResults(
+        pop,
+        d_votes,
+        tot_votes,
+        dict(demos),
+        dict(pop_by_county),
+        area,
+        perimeter,
+        2 * r,
+        spanning_tree_score,
+        cut_edges,
+    )
+
+
+def analyze_plan_incrementally(
+    assignments: List[Assignment],
+    data: Dict[str, Dict[str, str | int]],
+    shapes: Dict[str, Any],
+    graph: Dict[str, List[str]],
+    metadata: Dict[str, Any],
+    cache: DistrictCache,
+    alt_minority: bool = True,
+    *,
+    which: Collection[str] = ANALYZE_FAMILIES,  # A subset of the metric families
+) -> Dict[str, Any]:
+    """Analyze a plan like analyze_plan(), only computing districts not in the cache.
+
+    Only the metric families in 'which' are in the scorecard, in the usual order.
+    """
+
+    compactness: bool = "compactness" in which
+
+    geoids_by_district: Dict[int | str, List[str]] = group_by_district(
+        assignments, graph, compactness
+    )
+    results_by_district: Dict[int | str, DistrictResults] = dict()
+    for district, geoids in geoids_by_district.items():
+        # Results without the geometry are cached separately
+        key: bytes = district_key(geoids) + (b"" if compactness else b"-")
+        results: Optional[DistrictResults] = cache.get(key)
+        if results is None:
+            results = analyze_district(geoids, data, shapes, graph, compactness)
+            cache.put(key, results)
+        results_by_district[district] = results
+
+    return score_districts(results_by_district, metadata, alt_minority, which=which)
+
+
+def analyze_plan_families(
+    assignments: List[Assignment],
+    data: Dict[str, Dict[str, str | int]],
+    shapes: Dict[str, Any],
+    graph: Dict[str, List[str]],
+    metadata: Dict[str, Any],
+    alt_minority: bool = True,
+    *,
+    which: Collection[str] = ANALYZE_FAMILIES,  # A subset of the metric families
+) -> Dict[str, Any]:
+    """Analyze a plan like analyze_plan(), for just the metric families in 'which'.
+
+    Each district is aggregated once for all the families, not once per family.
+    """
+
+    compactness: bool = "compactness" in which
+
+    geoids_by_district: Dict[int | str, List[str]] = group_by_district(
+        assignments, graph, compactness
+    )
+    results_by_district: Dict[int | str, DistrictResults] = {
+        district: analyze_district(geoids, data, shapes, graph, compactness)
+        for district, geoids in geoids_by_district.items()
+    }
+
+    return score_districts(results_by_district, metadata, alt_minority, which=which)
+
+
+def group_by_district(
+    assignments: List[Assignment],
+    graph: Dict[str, List[str]],
+    compactness: bool,
+) -> Dict[int | str, List[str]]:
+    """The precincts by district, in the order the districts first appear, as
+    analyze_plan() aggregates them."""
+
+    # Make sure the plan & graph have the same precincts, like split_graph_by_districts()
+    if compactness and {a.geoid for a in assignments} != set(graph) - {OUT_OF_STATE}:
+        raise ValueError(
+            "Graph and district assignments must contain the same vertices"
+        )
+
+    geoids_by_district: Dict[int | str, List[str]] = defaultdict(list)
+    for a in assignments:
+        geoids_by_district[a.district].append(a.geoid)
+
+    return geoids_by_district
+
+
+def score_districts(
+    results_by_district: Dict[int | str, DistrictResults],
+    metadata: Dict[str, Any],
+    alt_minority: bool = True,
+    *,
+    which: Collection[str] = ANALYZE_FAMILIES,
+) -> Dict[str, Any]:
+    """Score a plan from the results for its districts, as analyze_plan() does."""
+
+    n_districts: int = metadata["D"]
+    n_counties: int = metadata["C"]
+    county_to_index: Dict[str, int] = metadata["county_to_index"]
+    district_to_index: Dict[int | str, int] = metadata["district_to_index"]
+
+    # Assemble the aggregates that aggregate_data_by_district() returns
+
+    pop_by_district: defaultdict[int | str, int] = defaultdict(int)
+    d_by_district: Dict[int | str, int] = defaultdict(int)
+    tot_by_district: Dict[int | str, int] = defaultdict(int)
+    demos_totals: Dict[str, int] = defaultdict(int)
+    demos_by_district: List[Dict[str, int]] = [
+        defaultdict(int) for _ in range(n_districts + 1)
+    ]
+    CxD: List[List[float]] = [[0.0] * n_counties for _ in range(n_districts)]
+
+    for district, results in results_by_district.items():
+        pop_by_district[district] = results.pop
+        d_by_district[district] = results.d_votes
+        tot_by_district[district] = results.tot_votes
+        for demo, n in results.demos.items():
+            demos_totals[demo] += n
+            demos_by_district[int(district)][demo] += n
+        i: int = district_to_index[district]
+        for county, pop in results.pop_by_county.items():
+            CxD[i][county_to_index[county]] += pop
+
+    aggregates: Dict[str, Any] = {
+        "total_pop": sum(pop_by_district.values()),
+        "pop_by_district": pop_by_district,
+        "total_votes": sum(tot_by_district.values()),
+        "total_d_votes": sum(d_by_district.values()),
+        "d_by_district": d_by_district,
+        "tot_by_district": tot_by_district,
+        "demos_totals": demos_totals,
+        "demos_by_district": demos_by_district[1:],  # Skip the dummy district
+        "CxD": CxD,
+    }
+
+    # The implied district props that aggregate_shapes_by_district() returns
+
+    district_props: List[Dict[str, float]] = [
+        {"area": 0.0, "perimeter": 0.0, "diameter": 0.0} for _ in range(n_districts)
+    ]
+    for district, results in results_by_district.items():
+        district_props[int(district) - 1] = {
+            "area": results.area,
+            "perimeter": results.perimeter,
+            "diameter": results.diameter,
+        }
+
+    # Score the plan, as analyze_plan() does
+
+    scorecard: Dict[str, Any] = dict()
+    by_district_metrics: List[List[Dict[str, float]]] = list()
+
+    if "partisan" in which:
+        scorecard["D"] = n_districts
+        scorecard["C"] = n_counties
+
+        scorecard["population_deviation"] = calc_population_deviation(
+            aggregates["pop_by_district"], aggregates["total_pop"], n_districts
+        )
+
+        partisan_metrics: Dict[str, Optional[float]] = calc_partisan_metrics(
+            aggregates["total_d_votes"],
+            aggregates["total_votes"],
+            aggregates["d_by_district"],
+            aggregates["tot_by_district"],
+        )
+        scorecard.update(partisan_metrics)
+        scorecard["proportionality"] = rate_proportionality(
+            scorecard["pr_deviation"],
+            scorecard["estimated_vote_pct"],
+            scorecard["estimated_seat_pct"],
+        )
+        scorecard["competitiveness"] = rate_competitiveness(
+            scorecard["competitive_district_pct"]
+        )
+
+    if "minority" in which:
+        minority_metrics: Dict[str, float] = calc_minority_metrics(
+            aggregates["demos_totals"], aggregates["demos_by_district"], n_districts
+        )
+        scorecard.update(minority_metrics)
+        scorecard["minority"] = rate_minority_opportunity(
+            scorecard["opportunity_districts"],
+            scorecard["proportional_opportunities"],
+            scorecard["coalition_districts"],
+            scorecard["proportional_coalitions"],
+        )
+
+        if alt_minority:
+            alt_minority_metrics: Dict[str, float] = calc_alt_minority_metrics(
+                aggregates["demos_totals"], aggregates["demos_by_district"], n_districts
+            )
+            scorecard.update(
+                {
+                    f"alt_{k}": v
+                    for k, v in alt_minority_metrics.items()
+                    if k
+                    in [
+                        "opportunity_districts",
+                        "opportunity_districts_pct",
+                        "coalition_districts",
+                    ]
+                }
+            )
+            scorecard["minority_alt"] = rate_minority_opportunity(
+                alt_minority_metrics["opportunity_districts"],
+                alt_minority_metrics["proportional_opportunities"],
+                alt_minority_metrics["coalition_districts"],
+                alt_minority_metrics["proportional_coalitions"],
+            )
+
+    if "compactness" in which:
+        compactness_metrics: Dict[str, float]
+        compactness_by_district: List[Dict[str, float]]
+        compactness_metrics, compactness_by_district = calc_compactness_metrics(
+            district_props
+        )
+        spanning_tree_by_district: List[Dict[str, float]] = [
+            {"spanning_tree_score": results.spanning_tree_score}
+            for results in results_by_district.values()
+        ]
+        compactness_metrics["cut_score"] = (
+            sum(results.cut_edges for results in results_by_district.values()) // 2
+        )
+        compactness_metrics["spanning_tree_score"] = sum(
+            d["spanning_tree_score"] for d in spanning_tree_by_district
+        )
+        scorecard.update(compactness_metrics)
+        scorecard["compactness"] = rate_compactness(
+            scorecard["reock"], scorecard["polsby_popper"]
+        )
+        by_district_metrics.extend([compactness_by_district, spanning_tree_by_district])
+
+    if "splitting" in which:
+        splitting_metrics: Dict[str, float]
+        splitting_by_district: List[Dict[str, float]]
+        splitting_metrics, splitting_by_district = calc_splitting_metrics(
+            aggregates["CxD"]
+        )
+        scorecard.update(splitting_metrics)
+        scorecard["splitting"] = rate_splitting(
+            scorecard["county_splitting"],
+            scorecard["district_splitting"],
+            n_counties,
+            n_districts,
+        )
+        by_district_metrics.append(splitting_by_district)
+
+    scorecard["by_district"] = [
+        {k: v for d in ds for k, v in d.items()} for ds in zip(*by_district_metrics)
+    ]
+
+    # Trim the floating point numbers
+    precision: int = 4
+    for metric in scorecard:
+        if scorecard[metric] is None or metric == "by_district":
+            continue
+        if metric not in int_metrics:
+            scorecard[metric] = round(scorecard[metric], precision)
+
+    return scorecard
+
+
+### END ###
@@ -0,0 +1,328 @@
+"""
+CACHE PARSED STATE INPUTS (DATA, GRAPH & SHAPES) AS MEMORY-MAPPED ARRAYS
+
+The first time a set of input files is loaded, the parsed tables, the graph,
+the integer-indexed adjacency & population arrays, and the simplified shapes
+are written as .npy files to a directory named by a hash of the files'
+contents. Later loads memory-map those arrays instead of re-parsing the
+CSV & JSON files.
+
+The shapes are simplified by keeping just the convex hull of each precinct's
+exterior. Scoring only uses the exterior points for the smallest circle that
+encloses a district, which the hull vertices determine, so this is lossless
+(up to floating-point rounding).
+
+Callers that can work with arrays -- e.g., random maps, which only need the
+population-weighted adjacency graph -- should use csr() & populations(). The
+data(), graph() & shapes() dicts are rebuilt from the arrays once per instance,
+for callers (e.g., scoring & ReCom) that need them in the load_*() form.
+
+Precincts are numbered in data file order. Other ids that appear in the
+graph or shapes (i.e., OUT_OF_STATE) are numbered after them.
+"""
+
+from typing import Any, List, Dict, Tuple, Optional
+
+import os, json, hashlib, shutil
+
+import numpy as np
+
+from rdabase import (
+    Graph,
+    mkAdjacencies,
+    populations,
+    load_data,
+    load_graph,
+    load_shapes,
+)
+
+from ..ust import CSRGraph, mkCSRGraph
+
+CACHE_VERSION: int = 2
+
+
+class StateInputs:
+    """The parsed inputs for a state, backed by (memory-mapped) arrays."""
+
+    path: str
+    geoid_field: str
+    fields: List[str]
+    ndata: int
+    arrays: Dict[str, np.ndarray]
+    _dicts: Dict[str, Any]  # The dicts rebuilt from the arrays, once
+
+    def __init__(self, path: str) -> None:
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            manifest: Dict[str, Any] = json.load(f)
+
+        self.path = path
+        self.geoid_field = manifest["geoid_field"]
+        self.fields = manifest["fields"]
+        self.ndata = manifest["ndata"]
+        self.arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in manifest["arrays"]
+        }
+        self._dicts = dict()
+
+    def ids(self) -> List[str]:
+        return self.arrays["ids"].tolist()
+
+    def geoids(self) -> List[str]:
+        return self.arrays["ids"][: self.ndata].tolist()
+
+    def has_shapes(self) -> bool:
+        return "shape_keys" in self.arrays
+
+    def csr(self) -> CSRGraph:
+        """The precinct adjacency graph, weighted by population, in CSR form."""
+
+        return CSRGraph(
+            self.geoids(),
+            self.arrays["indptr"],
+            self.arrays["indices"],
+            self.arrays["weights"],
+        )
+
+    def populations(self) -> Dict[str, int]:
+        return dict(zip(self.geoids(), self.arrays["weights"].tolist()))
+
+    def data(self) -> Dict[str, Dict[str, int | str]]:
+        """The data by GEOID, as load_data() returns it (rebuilt from the arrays)."""
+
+        if "data" in self._dicts:
+            return self._dicts["data"]
+
+        names: List[str] = [self.geoid_field] + self.fields
+        data: Dict[str, Dict[str, int | str]] = {
+            geoid: dict(zip(names, [geoid] + row))
+            for geoid, row in zip(self.geoids(), self.arrays["table"].tolist())
+        }
+        self._dicts["data"] = data
+
+        return data
+
+    def graph(self) -> Dict[str, List[str]]:
+        """The graph, as load_graph() returns it (rebuilt from the arrays)."""
+
+        if "graph" in self._dicts:
+            return self._dicts["graph"]
+
+        graph: Dict[str, List[str]] = dict(
+            zip(
+                self._names("graph_keys"),
+                self._blocks("graph_indptr", self._names("graph_indices")),
+            )
+        )
+        self._dicts["graph"] = graph
+
+        return graph
+
+    def shapes(self) -> Dict[str, Any]:
+        """The shapes, as load_shapes() returns them, with simplified exteriors."""
+
+        if "shapes" in self._dicts:
+            return self._dicts["shapes"]
+
+        arc_lengths: List[float] = self.arrays["arc_lengths"].tolist()
+        arcs: List[List[Tuple[str, float]]] = self._blocks(
+            "arc_indptr", list(zip(self._names("arc_ids"), arc_lengths))
+        )
+        exteriors: List[List[List[float]]] = self._blocks(
+            "exterior_indptr", self.arrays["exterior_xy"].tolist()
+        )
+
+        shapes: Dict[str, Any] = {
+            key: {
+                "center": center,
+                "area": area,
+                "arcs": dict(arc),
+                "exterior": exterior,
+            }
+            for key, center, area, arc, exterior in zip(
+                self._names("shape_keys"),
+                self.arrays["centers"].tolist(),
+                self.arrays["areas"].tolist(),
+                arcs,
+                exteriors,
+            )
+        }
+        self._dicts["shapes"] = shapes
+
+        return shapes
+
+    def _names(self, name: str) -> List[str]:
+        ids: List[str] = self.ids()
+        return [ids[i] for i in self.arrays[name].tolist()]
+
+    def _blocks(self, indptr_name: str, items: List) -> List[List]:
+        indptr: List[int] = self.arrays[indptr_name].tolist()
+        return [items[indptr[i] : indptr[i + 1]] for i in range(len(indptr) - 1)]
+
+
+def load_state_inputs(
+    data_path: str,
+    graph_path: str,
+    shapes_path: Optional[str] = None,
+    *,
+    cache_dir: str,
+) -> StateInputs:
+    """Load the inputs for a state from the cache, caching them first if need be."""
+
+    paths: List[str] = [p for p in (data_path, graph_path, shapes_path) if p]
+    path: str = os.path.join(cache_dir, cache_key(paths))
+
+    if not os.path.isdir(path):
+        cache_state_inputs(path, data_path, graph_path, shapes_path)
+
+    return StateInputs(path)
+
+
+def cache_key(paths: List[str]) -> str:
+    """A hash of the contents of the input files."""
+
+    h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for path in paths:
+        file_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                file_hash.update(chunk)
+        h.update(file_hash.digest())
+
+    return h.hexdigest()[:24]
+
+
+def cache_state_inputs(
+    path: str,
+    data_path: str,
+    graph_path: str,
+    shapes_path: Optional[str] = None,
+) -> None:
+    """Parse the input files & write them to a cache directory."""
+
+    data: Dict[str, Dict[str, int | str]] = load_data(data_path)
+    graph: Dict[str, List[str]] = load_graph(graph_path)
+    shapes: Optional[Dict[str, Any]] = load_shapes(shapes_path) if shapes_path else None
+
+    names: List[str] = list(next(iter(data.values())).keys())
+    geoid_field: str = names[0]
+    fields: List[str] = names[1:]
+
+    # Number the precincts first, then any other ids (e.g., OUT_OF_STATE)
+    ids: List[str] = list(data.keys())
+    offset_by_id: Dict[str, int] = {id: i for i, id in enumerate(ids)}
+    others: List[str] = list(graph.keys()) + [n for ns in graph.values() for n in ns]
+    if shapes is not None:
+        others += list(shapes.keys())
+        others += [n for shape in shapes.values() for n in shape["arcs"]]
+    for id in others:
+        if id not in offset_by_id:
+            offset_by_id[id] = len(ids)
+            ids.append(id)
+
+    csr: CSRGraph = mkCSRGraph(mkAdjacencies(Graph(graph)), populations(data))
+
+    arrays: Dict[str, np.ndarray] = {
+        "ids": np.array(ids, dtype=str),
+        "table": np.array(
+            [[row[f] for f in fields] for row in data.values()], dtype=np.int64
+        ).reshape(len(data), len(fields)),
+        "indptr": csr.indptr,
+        "indices": csr.indices,
+        "weights": csr.weights,
+        "graph_keys": offsets(graph.keys(), offset_by_id),
+        "graph_indptr": indptr(graph.values()),
+        "graph_indices": offsets(
+            [n for ns in graph.values() for n in ns], offset_by_id
+        ),
+    }
+
+    if shapes is not None:
+        hulls: List[List[List[float]]] = [
+            convex_hull(shape["exterior"]) for shape in shapes.values()
+        ]
+        arrays.update(
+            {
+                "shape_keys": offsets(shapes.keys(), offset_by_id),
+                "centers": np.array(
+                    [shape["center"] for shape in shapes.values()], dtype=np.float64
+                ).reshape(len(shapes), 2),
+                "areas": np.array(
+                    [shape["area"] for shape in shapes.values()], dtype=np.float64
+                ),
+                "arc_indptr": indptr([shape["arcs"] for shape in shapes.values()]),
+                "arc_ids": offsets(
+                    [n for shape in shapes.values() for n in shape["arcs"]],
+                    offset_by_id,
+                ),
+                "arc_lengths": np.array(
+                    [x for shape in shapes.values() for x in shape["arcs"].values()],
+                    dtype=np.float64,
+                ),
+                "exterior_indptr": indptr(hulls),
+                "exterior_xy": np.array(
+                    [pt for hull in hulls for pt in hull], dtype=np.float64
+                ).reshape(-1, 2),
+            }
+        )
+
+    manifest: Dict[str, Any] = {
+        "version": CACHE_VERSION,
+        "sources": [p for p in (data_path, graph_path, shapes_path) if p],
+        "geoid_field": geoid_field,
+        "fields": fields,
+        "ndata": len(data),
+        "arrays": list(arrays.keys()),
+    }
+
+    # Write to a temporary directory & rename it, so readers never see a partial cache.
+    tmp: str = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(tmp, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), array)
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        # Another process cached the same inputs first.
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def convex_hull(points: List[List[float]]) -> List[List[float]]:
+    """The vertices of the convex hull of a list of points, counterclockwise."""
+
+    pts: List[Tuple[float, float]] = sorted(set((float(x), float(y)) for x, y in points))
+    if len(pts) < 3:
+        return [list(pt) for pt in pts]
+
+    def cross(o, a, b) -> float:
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower: List[Tuple[float, float]] = list()
+    for pt in pts:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], pt) <= 0:
+            lower.pop()
+        lower.append(pt)
+    upper: List[Tuple[float, float]] = list()
+    for pt in reversed(pts):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], pt) <= 0:
+            upper.pop()
+        upper.append(pt)
+
+    return [list(pt) for pt in lower[:-1] + upper[:-1]]
+
+
+def offsets(ids, offset_by_id: Dict[str, int]) -> np.ndarray:
+    return np.array([offset_by_id[id] for id in ids], dtype=np.int32)
+
+
+def indptr(blocks) -> np.ndarray:
+    ptr: np.ndarray = np.zeros(len(blocks) + 1, dtype=np.int64)
+    np.cumsum([len(block) for block in blocks], out=ptr[1:])
+
+    return ptr
+
+
+### END ###
@@ -1,8 +1,15 @@
 """
 ID NOTABLE MAPS IN AN ENSEMBLE
+
+The ratings of the maps are an int array with a row per map, so the filters are
+a boolean mask and the best map in each dimension is found with array operations:
+the first qualifying map with the highest rating in that dimension and, among
+those, the highest sum of ratings -- the map that better_map() ends up with.
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
 
 ratings_dimensions: List[str] = [
     "proportionality",
@@ -17,30 +24,50 @@ ratings_indexes: List[int] = list(range(5))
 def id_notable_maps(scores: List[Dict[str, Any]], filters: List[int]) -> Dict[str, Any]:
     """Find the notable maps in a scored ensemble of maps."""
 
+    names: List[Any] = [s["map"] for s in scores]
+    ratings: np.ndarray = ratings_array(scores)
+
+    return id_notable_maps_from_ratings(names, ratings, filters)
+
+
+def ratings_array(scores: List[Dict[str, Any]]) -> np.ndarray:
+    """The ratings of each map, as a row of an int array."""
+
+    return np.array(
+        [[int(s[m]) for m in ratings_dimensions] for s in scores], dtype=np.int64
+    ).reshape(-1, len(ratings_dimensions))
+
+
+def id_notable_maps_from_ratings(
+    names: Sequence[Any],  # The map names, in ensemble order
+    ratings: np.ndarray,  # A row of ratings for each map
+    filters: List[int],
+) -> Dict[str, Any]:
+    """Find the notable maps, given the names & ratings of the maps in an ensemble."""
+
     output: Dict[str, Any] = dict()
     notable_maps: List[Dict[str, Any]] = [
         {m: "None", "ratings": []} for m in ratings_dimensions
     ]
 
-    total: int = 0
-    qualifying: int = 0
-
-    for s in scores:
-        total += 1
-        ratings: List[int] = [int(s[m]) for m in ratings_dimensions]
-        if not qualifying_map(ratings, filters):
-            continue
+    qualifying: np.ndarray = np.flatnonzero(
+        np.all(ratings >= np.asarray(filters), axis=1)
+    )
+    candidates: np.ndarray = ratings[qualifying]
+    sums: np.ndarray = candidates.sum(axis=1)
 
+    if len(qualifying) > 0:
         for d in ratings_indexes:
-            if better_map(ratings, notable_maps[d], d):
-                notable_maps[d][ratings_dimensions[d]] = s["map"]
-                notable_maps[d]["ratings"] = ratings
+            best: np.ndarray = candidates[:, d] == candidates[:, d].max()
+            best &= sums == sums[best].max()
+            i: int = int(np.argmax(best))  # The first of any ties
 
-        qualifying += 1
+            notable_maps[d][ratings_dimensions[d]] = names[qualifying[i]]
+            notable_maps[d]["ratings"] = candidates[i].tolist()
 
-    output["size"] = total
+    output["size"] = len(names)
     output["filters"] = filters
-    output["qualifying"] = qualifying
+    output["qualifying"] = len(qualifying)
     output["notable_maps"] = notable_maps
 
     return output
@@ -2,33 +2,41 @@
 SCORE AN ENSEMBLE OF PLANS
 """
 
-from typing import List, Dict, Set, Any, Callable
+from typing import List, Dict, Set, Any, Callable, Iterable, Iterator, Optional, Tuple
 
-import sys
-from collections import defaultdict, OrderedDict
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
 
 
+import numpy as np
+
 from rdabase import (
     mkPoints,
     Point,
-    index_points,
-    IndexedPoint,
-    populations,
-    index_geoids,
-    index_assignments,
     Assignment,
-    IndexedWeightedAssignment,
-    calc_energy,
     read_csv,
     time_function,
 )
 from rdascore import analyze_plan
 from .utils import make_plan
+from .vectors import PlanIndex, district_vector, calc_energy_vector
+from .score_store import ScoreSink
+from .score_cache import ScoreCache, inputs_fingerprint, plan_key
+from .incremental import (
+    DistrictCache,
+    analyze_plan_incrementally,
+    analyze_plan_families,
+    ANALYZE_FAMILIES,
+)
+
+# The families of metrics that can be selected, in column order
+METRIC_FAMILIES: List[str] = ANALYZE_FAMILIES + ["population_compactness"]
 
 
 @time_function
 def score_ensemble(
-    plans: List[Dict[str, str | float | Dict[str, int | str]]],
+    plans: Iterable[Dict[str, str | float | Dict[str, int | str]]],
     data: Dict[str, Dict[str, int | str]],
     shapes: Dict[str, Any],
     graph: Dict[str, List[str]],
@@ -36,95 +44,284 @@ def score_ensemble(
     *,
     more_data: Dict[str, Any] = {},
     more_scores_fn: Callable[..., Dict[str, float | int]],
+    workers: int = 1,  # Score plans in parallel in this many processes
+    chunk_size: int = 10,  # The number of plans to send a worker at a time
+    incremental: bool = False,  # Reuse the results for districts already scored
+    store: Optional[ScoreSink] = None,  # Skip plans in it & append new scores
+    cache: Optional[ScoreCache] = None,  # Reuse the scores for plans seen before
+    metrics: Optional[Iterable[str]] = None,  # Some of METRIC_FAMILIES; default all
 ) -> List[Dict]:
-    """Score an ensemble of maps."""
-
-    points: List[Point] = mkPoints(data, shapes)
+    """Score an ensemble of maps.
+
+    With more than one worker, the inputs are given to each worker process once,
+    when it starts, and plans are scored in chunks. Either way, the scores are in
+    plan order, and plans that fail to score are skipped.
+
+    When scoring incrementally, each process caches the per-district results, so
+    successive plans that share districts (e.g., ReCom plans) only compute the
+    districts that changed.
+
+    With a score store, plans already in it aren't rescored, and the scores for
+    each new plan are appended to it as soon as they're ready. Only the new scores
+    are returned.
+
+    With a score cache, the scores for a plan that has been scored before with the
+    same inputs -- in this ensemble or another one -- are looked up instead of
+    computed again.
+
+    Selecting some metric families only computes those (and whatever extra scores
+    the more_scores_fn adds): without compactness, the shapes aren't aggregated,
+    and without population compactness, the precinct points aren't made.
+    """
+
+    selected: List[str] = METRIC_FAMILIES if metrics is None else list(metrics)
+    for m in selected:
+        if m not in METRIC_FAMILIES:
+            raise ValueError(
+                f"Unknown metric family '{m}'. Choose from {', '.join(METRIC_FAMILIES)}."
+            )
+    selected = [m for m in METRIC_FAMILIES if m in selected]
 
-    indexed_geoids: Dict[str, int] = index_geoids(points)
-    indexed_points: List[IndexedPoint] = index_points(points)
+    if store is not None:
+        plans = (p for p in plans if str(p["name"]) not in store)
 
-    ipop_by_geoid: Dict[str, int] = populations(data)
-    epsilon: float = 0.01  # Minimum population per precinct
-    fpop_by_geoid: Dict[str, float] = {
-        k: float(max(epsilon, v)) for k, v in ipop_by_geoid.items()
-    }
+    # Plans are scored as vectors of districts in this GEOID order
+    plan_index: PlanIndex
+    if "population_compactness" in selected:
+        points: List[Point] = mkPoints(data, shapes)  # Minimum population 0.01
+        plan_index = PlanIndex(points)
+    else:
+        plan_index = PlanIndex.from_geoids(list(data.keys()))  # mkPoints() order
 
     N: int = int(metadata["D"])
 
+    fingerprint: bytes = (
+        inputs_fingerprint(
+            data, shapes, graph, metadata, more_data, more_scores_fn, selected
+        )
+        if cache is not None
+        else b""
+    )
+
+    initargs: Tuple = (
+        data,
+        shapes,
+        graph,
+        metadata,
+        plan_index,
+        more_data,
+        more_scores_fn,
+        incremental,
+        cache,
+        fingerprint,
+        selected,
+    )
+    results: Iterator[Optional[Dict]]
+    if workers > 1:
+        results = score_plans_in_parallel(enumerate(plans), workers, chunk_size, initargs)
+    else:
+        init_worker(*initargs)
+        results = (score_plan(i, p) for i, p in enumerate(plans))
+
     scores: List[Dict] = list()
+    for record in results:
+        if record is None:
+            continue
+        scores.append(record)
+        if store is not None:
+            store.append(record)
 
-    for i, p in enumerate(plans):
-        plan_name: str = str(p["name"])
-        print(f"Scoring {i}: {plan_name} ...")
+    return scores
 
-        try:
-            plan_dict: Dict[str, int | str] = p["plan"]  # type: ignore
-            assignments: List[Assignment] = make_plan(plan_dict)
-            indexed_assignments: List[IndexedWeightedAssignment] = index_assignments(
-                assignments, indexed_geoids, fpop_by_geoid
-            )
 
-            # Make sure districts are indexed [1, 2, 3, ...]
-            district_ids: Set[int | str] = set()
-            for a in assignments:
-                district_ids.add(a.district)
-            if min(district_ids) != 1:
-                print("Districts must be indexed [1, 2, 3, ...]")
-                sys.exit(1)
+### HELPERS FOR SCORING PLANS IN WORKER PROCESSES ###
 
-            energy: float = calc_energy(indexed_assignments, indexed_points)
+worker_state: Dict[str, Any] = dict()
 
-            record: OrderedDict[str, Any] = OrderedDict()
-            record["map"] = plan_name
 
-            scorecard: Dict[str, Any] = analyze_plan(
+def init_worker(
+    data: Dict[str, Dict[str, int | str]],
+    shapes: Dict[str, Any],
+    graph: Dict[str, List[str]],
+    metadata: Dict[str, Any],
+    plan_index: PlanIndex,
+    more_data: Dict[str, Any],
+    more_scores_fn: Callable[..., Dict[str, float | int]],
+    incremental: bool = False,
+    cache: Optional[ScoreCache] = None,  # Reopened in each worker process
+    fingerprint: bytes = b"",
+    metrics: List[str] = METRIC_FAMILIES,
+) -> None:
+    """Give a worker process the (read-only) inputs for scoring, once."""
+
+    worker_state["data"] = data
+    worker_state["shapes"] = shapes
+    worker_state["graph"] = graph
+    worker_state["metadata"] = metadata
+    worker_state["plan_index"] = plan_index
+    worker_state["more_data"] = more_data
+    worker_state["more_scores_fn"] = more_scores_fn
+    worker_state["district_cache"] = DistrictCache() if incremental else None
+    worker_state["score_cache"] = cache
+    worker_state["fingerprint"] = fingerprint
+    worker_state["metrics"] = metrics
+
+
+def score_plan(
+    i: int, p: Dict[str, str | float | Dict[str, int | str]]
+) -> Optional[Dict]:
+    """Score a plan, or return None if that failed."""
+
+    data: Dict[str, Dict[str, int | str]] = worker_state["data"]
+    shapes: Dict[str, Any] = worker_state["shapes"]
+    graph: Dict[str, List[str]] = worker_state["graph"]
+    metadata: Dict[str, Any] = worker_state["metadata"]
+    more_data: Dict[str, Any] = worker_state["more_data"]
+    more_scores_fn: Callable[..., Dict[str, float | int]] = worker_state[
+        "more_scores_fn"
+    ]
+
+    plan_name: str = str(p["name"])
+    print(f"Scoring {i}: {plan_name} ...")
+
+    try:
+        plan_dict: Dict[str, int | str] = p["plan"]  # type: ignore
+        districts: np.ndarray = district_vector(plan_dict, worker_state["plan_index"])
+
+        # Make sure districts are indexed [1, 2, 3, ...], or skip the plan
+        if districts.min() != 1:
+            raise ValueError("Districts must be indexed [1, 2, 3, ...]")
+
+        record: OrderedDict[str, Any] = OrderedDict()
+        record["map"] = plan_name
+
+        score_cache: Optional[ScoreCache] = worker_state["score_cache"]
+        key: bytes = b""
+        if score_cache is not None:
+            key = plan_key(districts, worker_state["fingerprint"])
+            cached: Optional[Dict[str, Any]] = score_cache.get(key)
+            if cached is not None:
+                record.update(cached)
+                return record
+
+        metrics: List[str] = worker_state["metrics"]
+        which: List[str] = [m for m in metrics if m in ANALYZE_FAMILIES]
+
+        assignments: List[Assignment] = make_plan(plan_dict)
+
+        cache: Optional[DistrictCache] = worker_state["district_cache"]
+        scorecard: Dict[str, Any] = (
+            analyze_plan_incrementally(
+                assignments, data, shapes, graph, metadata, cache, which=which
+            )
+            if cache is not None
+            else analyze_plan_metrics(
                 assignments,
                 data,
                 shapes,
                 graph,
                 metadata,
+                which,
             )
+        )
+
+        # Remove by-district compactness & splitting from from the scores
+        by_district: List[Dict[str, float]] = scorecard.pop("by_district")
+
+        # Add the (flat) scores
+        record.update(scorecard)
 
-            # Remove by-district compactness & splitting from from the scores
-            by_district: List[Dict[str, float]] = scorecard.pop("by_district")
+        # Add 'energy' as 'population_compactness' as the last compactness score
+        if "population_compactness" in metrics:
+            energy: float = calc_energy_vector(districts, worker_state["plan_index"])
+            keys: List[str] = list(record.keys())
+            if "spanning_tree_score" in record:
+                record = insert_pair_after(
+                    record,
+                    "spanning_tree_score",
+                    "population_compactness",
+                    energy,
+                )
+            elif "county_splitting" in record:  # Before the splitting scores
+                record = insert_pair_after(
+                    record,
+                    keys[keys.index("county_splitting") - 1],
+                    "population_compactness",
+                    energy,
+                )
+            else:
+                record["population_compactness"] = energy
 
-            # Add the (flat) scores
-            record.update(scorecard)
+        ### Optionally, compute additional scores #########################
 
-            # Add 'energy' as 'population_compactness' as the last compactness score
-            record = insert_pair_after(
+        if more_data and more_scores_fn:
+            more_scores: Dict[str, float | int] = more_scores_fn(
                 record,
-                "spanning_tree_score",
-                "population_compactness",
-                energy,
+                by_district,
+                assignments,
+                data,
+                shapes,
+                graph,
+                metadata,
+                more_data,
             )
+        record.update(more_scores)
 
-            ### Optionally, compute additional scores #########################
+        ###################################################################
 
-            if more_data and more_scores_fn:
-                more_scores: Dict[str, float | int] = more_scores_fn(
-                    record,
-                    by_district,
-                    assignments,
-                    data,
-                    shapes,
-                    graph,
-                    metadata,
-                    more_data,
-                )
-            record.update(more_scores)
+        if score_cache is not None:
+            score_cache.put(key, {k: v for k, v in record.items() if k != "map"})
 
-            ###################################################################
+        return record
 
-            scores.append(record)
-            pass
+    except Exception as e:
+        print(f"Failure: {e}")
+        return None
 
-        except Exception as e:
-            print(f"Failure: {e}")
-            pass
 
-    return scores
+def analyze_plan_metrics(
+    assignments: List[Assignment],
+    data: Dict[str, Dict[str, int | str]],
+    shapes: Dict[str, Any],
+    graph: Dict[str, List[str]],
+    metadata: Dict[str, Any],
+    which: List[str],  # Some of ANALYZE_FAMILIES, in order
+) -> Dict[str, Any]:
+    """Analyze a plan for just the selected metric families, aggregating it once."""
+
+    if which == ANALYZE_FAMILIES:
+        return analyze_plan(assignments, data, shapes, graph, metadata)
+
+    return analyze_plan_families(
+        assignments, data, shapes, graph, metadata, which=which
+    )
+
+
+def score_chunk(
+    chunk: List[Tuple[int, Dict[str, str | float | Dict[str, int | str]]]],
+) -> List[Optional[Dict]]:
+    return [score_plan(i, p) for i, p in chunk]
+
+
+def score_plans_in_parallel(
+    plans: Iterator[Tuple[int, Dict[str, str | float | Dict[str, int | str]]]],
+    workers: int,
+    chunk_size: int,
+    initargs: Tuple,
+) -> Iterator[Optional[Dict]]:
+    """Score chunks of plans in a process pool, yielding the scores in plan order."""
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=initargs
+    ) as executor:
+        pending: deque[Future] = deque()
+        while chunk := list(islice(plans, chunk_size)):
+            pending.append(executor.submit(score_chunk, chunk))
+            # Only read as many plans ahead as the workers can be busy with
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
 
 def insert_pair_after(d, key, new_key, new_value):
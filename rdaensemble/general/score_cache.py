@@ -0,0 +1,214 @@
+"""
+A CONTENT-ADDRESSED CACHE OF PLAN SCORES
+
+The same plans get scored over & over: official proxies added to ensembles,
+plans copied from one ensemble to another, notable maps rescored, and
+duplicate plans within an ensemble (e.g., ReCom "Same plan 2x"). So the scores
+for a plan are cached on disk, keyed by a hash of its district vector (in the
+GEOID order of the inputs) & a fingerprint of the inputs and the versions of
+the scoring packages -- including the package the more_scores_fn comes from
+(e.g., rdaei). The plan's name isn't part of the key.
+
+The inputs are hashed in a canonical form -- dicts sorted by key, and the
+county_to_index map (built from a set, so in an order that varies by process)
+reduced to its sorted counties -- so the fingerprint is the same in every run.
+
+The cache is a SQLite database, so worker processes can share it. When it grows
+past its maximum size, the least recently used scores are evicted.
+"""
+
+from typing import Any, List, Dict, Optional, Callable
+
+import json, time, sqlite3, hashlib
+from importlib.metadata import version, packages_distributions, PackageNotFoundError
+
+import numpy as np
+
+SCORING_PACKAGES: List[str] = ["rdaensemble", "rdascore", "rdapy", "rdabase"]
+
+
+def package_version(package: str) -> str:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def module_version(module: str) -> str:
+    """The version of the installed package that a module is in."""
+
+    top: str = module.split(".")[0]
+    distributions: List[str] = packages_distributions().get(top, [top])
+
+    return package_version(distributions[0])
+
+
+def inputs_fingerprint(
+    data: Dict[str, Dict[str, int | str]],
+    shapes: Dict[str, Any],
+    graph: Dict[str, List[str]],
+    metadata: Dict[str, Any],
+    more_data: Dict[str, Any] = {},
+    more_scores_fn: Optional[Callable] = None,
+    metrics: List[str] = [],  # The metric families selected
+) -> bytes:
+    """A hash of the inputs for scoring plans & the versions of the scoring packages."""
+
+    h = hashlib.blake2b(digest_size=16)
+    for package in SCORING_PACKAGES:
+        h.update(f"{package}=={package_version(package)}\n".encode())
+    h.update(f"{','.join(metrics)}\n".encode())
+    if more_data and more_scores_fn:
+        module: str = more_scores_fn.__module__
+        h.update(
+            f"{module}.{more_scores_fn.__qualname__}=={module_version(module)}\n".encode()
+        )
+    # The county indexes are arbitrary, so just the counties matter.
+    metadata = dict(metadata)
+    if "county_to_index" in metadata:
+        metadata["county_to_index"] = sorted(metadata["county_to_index"])
+
+    for inputs in [data, shapes, graph, metadata, more_data]:
+        h.update(json.dumps(canonical(inputs), default=str).encode())
+
+    return h.digest()
+
+
+def canonical(x: Any) -> Any:
+    """A form of the inputs that doesn't depend on dict or set order."""
+
+    if isinstance(x, dict):
+        return sorted(
+            ([str(k), canonical(v)] for k, v in x.items()), key=lambda kv: kv[0]
+        )
+    if isinstance(x, (set, frozenset)):
+        return sorted(str(v) for v in x)
+    if isinstance(x, (list, tuple)):
+        # Lists of numbers (e.g., shape coordinates) are already canonical
+        if x and not isinstance(x[0], (dict, set, frozenset, list, tuple)):
+            return x
+        return [canonical(v) for v in x]
+
+    return x
+
+
+def plan_key(districts: np.ndarray, fingerprint: bytes) -> bytes:
+    """The cache key for a plan, given its district vector & the inputs fingerprint."""
+
+    h = hashlib.blake2b(fingerprint, digest_size=16)
+    h.update(districts.astype("<i4").tobytes())
+
+    return h.digest()
+
+
+class ScoreCache:
+    """Plan scores on disk, evicting the least recently used beyond a maximum size."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_bytes: int = 256 * 1024 * 1024,
+        evict_every: int = 100,  # Check the size after this many puts
+    ) -> None:
+        self.path: str = path
+        self.max_bytes: int = max_bytes
+        self.evict_every: int = evict_every
+        self.hits: int = 0
+        self.misses: int = 0
+        self._nputs: int = 0
+
+        self._db: sqlite3.Connection = sqlite3.connect(
+            path, timeout=60, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores "
+            "(key BLOB PRIMARY KEY, record TEXT, size INTEGER, last_used INTEGER)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)"
+        )
+
+    # Worker processes reopen the cache, rather than sharing a connection.
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "evict_every": self.evict_every,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        path: str = state.pop("path")
+        self.__init__(path, **state)  # type: ignore
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """The scores for a plan (less its name), if they're in the cache."""
+
+        row: Optional[tuple] = self._db.execute(
+            "SELECT record FROM scores WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._db.execute(
+            "UPDATE scores SET last_used = ? WHERE key = ?", (time.time_ns(), key)
+        )
+
+        return json.loads(row[0])
+
+    def put(self, key: bytes, record: Dict[str, Any]) -> None:
+        """Cache the scores for a plan (less its name)."""
+
+        text: str = json.dumps(record)
+        self._db.execute(
+            "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+            (key, text, len(text), time.time_ns()),
+        )
+
+        self._nputs += 1
+        if self._nputs % self.evict_every == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        """Evict the least recently used scores, until the cache fits its maximum size."""
+
+        total: int = self.size()
+        if total <= self.max_bytes:
+            return
+
+        excess: int = total - self.max_bytes
+        evicted: List[bytes] = list()
+        for key, size in self._db.execute(
+            "SELECT key, size FROM scores ORDER BY last_used"
+        ):
+            if excess <= 0:
+                break
+            evicted.append(key)
+            excess -= size
+
+        self._db.executemany("DELETE FROM scores WHERE key = ?", [(k,) for k in evicted])
+
+    def size(self) -> int:
+        """The size of the cached scores, in bytes."""
+
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM scores").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ScoreCache":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+### END ###
@@ -0,0 +1,324 @@
+"""
+AN APPEND-ONLY STORE OF ENSEMBLE SCORES
+
+Scores are appended to a CSV as each plan is scored, so scoring that dies
+partway through an ensemble can pick up where it left off: the plans already
+in the store are skipped. Likewise, scoring an ensemble that has grown only
+scores the new plans.
+
+A last row cut short by a crash is dropped when the store is reopened.
+
+Scores can also be written to Parquet (if pyarrow is installed), in batches as
+plans are scored. That keeps full float64 precision, types the rating columns
+as integers, and puts the scores metadata in the schema metadata. A Parquet file
+can't be read until it's closed, so the scores are a directory of part files,
+each written whole. Reopening the store reads just the plan names from them.
+"""
+
+from typing import Any, List, Dict, Optional, Tuple
+
+import os, csv, json
+
+import numpy as np
+
+from .incremental import int_metrics
+
+INT_COLUMNS: List[str] = ["D", "C"] + int_metrics
+
+
+class CSVScoreStore:
+    """The scores for an ensemble in a CSV, appended to a plan at a time."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        precision: str = "{:.4f}",
+        flush_every: int = 10,
+    ) -> None:
+        self.path: str = path
+        self.precision: str = precision
+        self.flush_every: int = flush_every
+        self.fields: Optional[List[str]] = None
+        self.done: set[str] = set()
+        self.nappended: int = 0
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            truncate_partial_line(path)
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                self.fields = next(reader, None)
+                if self.fields:
+                    i: int = self.fields.index("map")
+                    self.done = set(row[i] for row in reader if row)
+
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        self._writer: Optional[csv.DictWriter] = (
+            csv.DictWriter(self._file, fieldnames=self.fields) if self.fields else None
+        )
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.done
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Add the scores for a plan."""
+
+        if self._writer is None:
+            self.fields = list(record.keys())
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fields)
+            self._writer.writeheader()
+        elif list(record.keys()) != self.fields:
+            raise ValueError(
+                f"The scores for {record['map']} don't have the fields in {self.path}."
+            )
+
+        self._writer.writerow(
+            {
+                k: self.precision.format(v) if isinstance(v, float) else v
+                for k, v in record.items()
+            }
+        )
+        self.done.add(str(record["map"]))
+
+        self.nappended += 1
+        if self.nappended % self.flush_every == 0:
+            self._file.flush()
+
+    def flush(self) -> None:
+        """Flush the scores appended so far all the way to disk."""
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "CSVScoreStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class ParquetScoreStore:
+    """The scores for an ensemble in a directory of Parquet part files.
+
+    Each batch of scores is written as its own complete Parquet file, part-NNNNNN,
+    so a killed run only loses the scores since the last batch.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        metadata: Dict[str, Any] = {},
+        *,
+        rows_per_part: int = 1000,
+    ) -> None:
+        pa, pq = import_pyarrow()
+
+        if os.path.isfile(path):
+            raise ValueError(f"{path} is a file, not a directory of Parquet scores.")
+
+        self.path: str = path
+        self.metadata: Dict[str, Any] = metadata
+        self.rows_per_part: int = rows_per_part
+        self.fields: Optional[List[str]] = None
+        self.done: set[str] = set()
+        self._schema: Any = None
+        self._rows: List[Dict[str, Any]] = list()
+
+        os.makedirs(path, exist_ok=True)
+        parts: List[str] = part_paths(path)
+        for part in parts:
+            table: Any = pq.read_table(part, columns=["map"])
+            self.done.update(str(m) for m in table.column("map").to_pylist())
+        if parts:
+            self._set_schema(pq.read_schema(parts[0]))
+        self._nparts: int = len(parts)
+
+    def _set_schema(self, schema: Any) -> None:
+        self._schema = schema.with_metadata(
+            {"scores_metadata": json.dumps(self.metadata)}
+        )
+        self.fields = list(schema.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.done
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Add the scores for a plan."""
+
+        if self._schema is None:
+            self._set_schema(score_schema(record))
+        elif list(record.keys()) != self.fields:
+            raise ValueError(
+                f"The scores for {record['map']} don't have the fields in {self.path}."
+            )
+
+        self._rows.append(record)
+        self.done.add(str(record["map"]))
+
+        if len(self._rows) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the scores appended so far as a new part file."""
+
+        pa, pq = import_pyarrow()
+
+        if not self._rows:
+            return
+
+        # Write under a hidden name & rename, so readers never see a partial part.
+        name: str = f"part-{self._nparts:06d}.parquet"
+        tmp: str = os.path.join(self.path, f".{name}.tmp")
+        pq.write_table(pa.Table.from_pylist(self._rows, schema=self._schema), tmp)
+        os.replace(tmp, os.path.join(self.path, name))
+
+        self._nparts += 1
+        self._rows = list()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ParquetScoreStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def part_paths(path: str) -> List[str]:
+    """The part files of Parquet scores in order, or just the file if it is one."""
+
+    if os.path.isfile(path):
+        return [path]
+
+    return [
+        os.path.join(path, name)
+        for name in sorted(os.listdir(path))
+        if name.startswith("part-") and name.endswith(".parquet")
+    ]
+
+
+ScoreSink = CSVScoreStore | ParquetScoreStore
+
+
+def is_parquet_scores(path: str) -> bool:
+    return path.endswith(".parquet")
+
+
+def open_score_store(
+    path: str, metadata: Dict[str, Any] = {}, *, precision: str = "{:.4f}"
+) -> ScoreSink:
+    """Open a score store, Parquet or CSV depending on the file extension."""
+
+    if is_parquet_scores(path):
+        return ParquetScoreStore(path, metadata)
+
+    return CSVScoreStore(path, precision=precision)
+
+
+def import_pyarrow() -> Tuple[Any, Any]:
+    """Import pyarrow, which is only needed for Parquet scores."""
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "Parquet scores require pyarrow. Install it with: pip install pyarrow"
+        )
+
+    return pa, pq
+
+
+def score_schema(record: Dict[str, Any]) -> Any:
+    """The Arrow schema for scores like these: ratings are integers, other scores floats."""
+
+    pa, pq = import_pyarrow()
+
+    fields: List[Any] = list()
+    for k, v in record.items():
+        if isinstance(v, str):
+            fields.append(pa.field(k, pa.string()))
+        elif k in INT_COLUMNS:
+            fields.append(pa.field(k, pa.int64()))
+        else:
+            fields.append(pa.field(k, pa.float64()))
+
+    return pa.schema(fields)
+
+
+def read_parquet_table(path: str, columns: Optional[List[str]] = None) -> Any:
+    """Read Parquet scores (part files, in order) as one Arrow table."""
+
+    pa, pq = import_pyarrow()
+
+    parts: List[str] = part_paths(path)
+    if not parts:
+        raise ValueError(f"No Parquet scores in {path}.")
+
+    return pa.concat_tables([pq.read_table(part, columns=columns) for part in parts])
+
+
+def read_parquet_scores(
+    path: str, columns: Optional[List[str]] = None
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Read the scores metadata & scores from Parquet scores."""
+
+    table: Any = read_parquet_table(path, columns)
+    schema_metadata: Dict[bytes, bytes] = table.schema.metadata or {}
+    metadata: Dict[str, Any] = json.loads(
+        schema_metadata.get(b"scores_metadata", b"{}")
+    )
+
+    return metadata, table.to_pylist()
+
+
+def read_parquet_columns(
+    path: str, columns: List[str]
+) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Read the scores metadata & just some score columns from Parquet scores."""
+
+    table: Any = read_parquet_table(path, columns)
+    schema_metadata: Dict[bytes, bytes] = table.schema.metadata or {}
+    metadata: Dict[str, Any] = json.loads(
+        schema_metadata.get(b"scores_metadata", b"{}")
+    )
+
+    return metadata, {
+        c: table.column(c).to_numpy(zero_copy_only=False) for c in columns
+    }
+
+
+def truncate_partial_line(path: str) -> None:
+    """Drop a last line that doesn't end with a newline."""
+
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size: int = f.tell()
+        f.seek(max(0, size - 1))
+        if f.read(1) == b"\n":
+            return
+
+        # Find the end of the last complete line
+        end: int = size
+        while end > 0:
+            start: int = max(0, end - 4096)
+            f.seek(start)
+            i: int = f.read(end - start).rfind(b"\n")
+            if i >= 0:
+                f.truncate(start + i + 1)
+                return
+            end = start
+        f.truncate(0)
+
+
+### END ###
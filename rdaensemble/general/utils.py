@@ -6,6 +6,8 @@ from typing import Any, Dict, List
 
 from rdabase import Assignment
 
+from .ensemble_io import EnsembleReader, PackedEnsembleReader, EnsembleSource
+
 
 def make_plan(assignments: Dict[str, int | str]) -> List[Assignment]:
     """Convert a dict of geoid: district assignments to a list of Assignments."""
@@ -17,10 +19,13 @@ def make_plan(assignments: Dict[str, int | str]) -> List[Assignment]:
 
 
 def plan_item_from_ensemble(
-    plan_name: str, ensemble: Dict[str, Any]
+    plan_name: str, ensemble: Dict[str, Any] | EnsembleSource
 ) -> Dict[str, str | float | Dict[str, int | str]]:
     """Return the named plan from an ensemble."""
 
+    if isinstance(ensemble, (EnsembleReader, PackedEnsembleReader)):
+        return ensemble.plan_item(plan_name)
+
     plans: List[Dict[str, str | float | Dict[str, int | str]]] = ensemble["plans"]
     for p in plans:
         if p["name"] == plan_name:
@@ -29,7 +34,7 @@ def plan_item_from_ensemble(
 
 
 def plan_from_ensemble(
-    plan_name: str, ensemble: Dict[str, Any]
+    plan_name: str, ensemble: Dict[str, Any] | EnsembleSource
 ) -> List[Dict[str, str | int]]:
     """Return the named plan from an ensemble as a list of geoid: district assignments."""
 
@@ -38,9 +43,8 @@ def plan_from_ensemble(
         plan_name, ensemble
     )
     plan_dict: Dict[str, int | str] = plan_item["plan"]  # type: ignore
-    assignments: List[Assignment] = make_plan(plan_dict)
     plan: List[Dict[str, str | int]] = [
-        {"GEOID": a.geoid, "DISTRICT": a.district} for a in assignments
+        {"GEOID": geoid, "DISTRICT": district} for geoid, district in plan_dict.items()
     ]
 
     return plan
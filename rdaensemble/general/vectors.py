@@ -0,0 +1,132 @@
+"""
+PLANS AS VECTORS OF DISTRICTS
+
+Rather than converting each plan to a list of Assignments and indexing those
+with dict lookups, a plan is turned into a vector of district ids aligned with
+a GEOID order that is computed once for the ensemble. Validation, population
+tallies, and population compactness (energy) are then vectorized operations,
+for one plan or a batch of plans at a time.
+"""
+
+from typing import List, Dict
+
+import numpy as np
+
+from rdabase import Point
+
+
+class PlanIndex:
+    """The GEOID order for plan vectors, with each precinct's population & location."""
+
+    geoids: List[str]
+    offset_by_geoid: Dict[str, int]
+    pops: np.ndarray  # float64, at least epsilon
+    lats: np.ndarray
+    longs: np.ndarray
+
+    def __init__(self, points: List[Point]) -> None:
+        self.geoids = [p.geoid for p in points]
+        self.offset_by_geoid = {geoid: i for i, geoid in enumerate(self.geoids)}
+        self.pops = np.array([p.pop for p in points], dtype=np.float64)
+        self.lats = np.array([p.ll.lat for p in points], dtype=np.float64)
+        self.longs = np.array([p.ll.long for p in points], dtype=np.float64)
+
+    @classmethod
+    def from_geoids(cls, geoids: List[str]) -> "PlanIndex":
+        """Just the GEOID order, when population compactness isn't needed."""
+
+        index: PlanIndex = cls([])
+        index.geoids = list(geoids)
+        index.offset_by_geoid = {geoid: i for i, geoid in enumerate(index.geoids)}
+
+        return index
+
+    def __len__(self) -> int:
+        return len(self.geoids)
+
+
+def district_vector(plan: Dict[str, int | str], index: PlanIndex) -> np.ndarray:
+    """The districts of a plan, in the GEOID order of the index."""
+
+    if len(plan) != len(index):
+        raise ValueError(f"Plan assigns {len(plan)} of {len(index)} precincts.")
+
+    try:
+        offsets: np.ndarray = np.fromiter(
+            (index.offset_by_geoid[geoid] for geoid in plan),
+            dtype=np.int64,
+            count=len(plan),
+        )
+    except KeyError as e:
+        raise ValueError(f"Plan assigns an unknown precinct {e}.")
+
+    districts: np.ndarray = np.empty(len(plan), dtype=np.int64)
+    districts[offsets] = np.fromiter(
+        (int(district) for district in plan.values()), dtype=np.int64, count=len(plan)
+    )
+
+    return districts
+
+
+def district_populations(districts: np.ndarray, pops: np.ndarray) -> np.ndarray:
+    """The population of each district 1 to N, indexed 0 to N-1."""
+
+    return np.bincount(districts - 1, weights=pops)
+
+
+def calc_energy_vector(districts: np.ndarray, index: PlanIndex) -> float:
+    """The population compactness (energy) of a plan, as calc_energy() computes it."""
+
+    return float(calc_energies(districts, index.lats, index.longs, index.pops)[0])
+
+
+def calc_energies(
+    districts: np.ndarray,  # A district vector, or a 2-D array with a plan per row
+    lats: np.ndarray,
+    longs: np.ndarray,
+    pops: np.ndarray,
+) -> np.ndarray:
+    """The population compactness (energy) of each plan, as calc_energy() computes it.
+
+    That is, the population-weighted sum of squared distances from each precinct
+    to the population-weighted centroid of its district. Each district's sums
+    are tallied in one pass with np.bincount, with the plans in a batch offset
+    into separate bins, and its energy is sum(p * |x|^2) - |sum(p * x)|^2 / sum(p).
+    """
+
+    districts = np.atleast_2d(districts)
+    nplans: int = districts.shape[0]
+    N: int = int(districts.max())
+
+    # Center the coordinates, so the one-pass sums don't lose precision.
+    x: np.ndarray = lats - np.average(lats, weights=pops)
+    y: np.ndarray = longs - np.average(longs, weights=pops)
+
+    bins: np.ndarray = (districts - 1 + N * np.arange(nplans)[:, np.newaxis]).ravel()
+
+    def tally(weights: np.ndarray) -> np.ndarray:
+        return np.bincount(
+            bins, weights=np.tile(weights, nplans), minlength=nplans * N
+        ).reshape(nplans, N)
+
+    totals: np.ndarray = tally(pops)
+    sum_x: np.ndarray = tally(pops * x)
+    sum_y: np.ndarray = tally(pops * y)
+    sum_squares: np.ndarray = tally(pops * (x * x + y * y))
+
+    # Districts above a plan's highest district don't count against it.
+    present: np.ndarray = np.arange(N) < districts.max(axis=1)[:, np.newaxis]
+    if np.any(present & (totals == 0)):
+        raise ValueError("Empty district: no precincts")
+
+    moments: np.ndarray = np.divide(
+        sum_x * sum_x + sum_y * sum_y,
+        totals,
+        out=np.zeros_like(totals),
+        where=totals > 0,
+    )
+
+    return (sum_squares - moments).sum(axis=1)
+
+
+### END ###
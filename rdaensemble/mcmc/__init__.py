@@ -5,6 +5,7 @@ from .setup_chain import (
     setup_unbiased_markov_chain,
 )
 from .run_chain import run_unbiased_chain
+from .checkpoint import load_checkpoint, checkpoint_plan
 from .optimized import (
     setup_optimized_markov_chain,
     run_optimized_chain,
@@ -0,0 +1,116 @@
+"""
+CHECKPOINT & RESUME A RECOM CHAIN
+
+A checkpoint records where run_unbiased_chain() was after keeping a plan:
+the plan itself, the partition's districts in the order the chain held them,
+the step & plans-kept counters, the state of the random number generators
+(including the chain's own), and the bookkeeping for reincarnated districts.
+
+To resume, a new chain is set up from the checkpointed plan, and resume_chain()
+rebuilds its partition with the checkpointed districts -- same labels, same
+order, since ReCom picks the districts to merge in that order -- and restores
+the random number generators. The first state the chain yields (the checkpointed
+plan again) is skipped. The resumed chain then yields the same plans as if it
+had never stopped.
+"""
+
+from typing import Any, List, Dict
+
+import os, json, random
+
+import numpy as np
+
+from gerrychain.partition.assignment import Assignment
+
+
+def rng_state(chain: Any = None) -> Dict[str, Any]:
+    """The states of the random number generators that ReCom draws from."""
+
+    version, internal, gauss_next = random.getstate()
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()  # type: ignore
+
+    state: Dict[str, Any] = {
+        "random": [version, list(internal), gauss_next],
+        "numpy": [name, keys.tolist(), pos, has_gauss, cached_gaussian],
+    }
+
+    # Newer GerryChains draw from the chain's own generator
+    chain_rng: Any = getattr(chain, "rng", None)
+    if chain_rng is not None:
+        version, internal, gauss_next = chain_rng.getstate()
+        state["chain"] = [version, list(internal), gauss_next]
+
+    return state
+
+
+def restore_rng_state(state: Dict[str, Any], chain: Any = None) -> None:
+    version, internal, gauss_next = state["random"]
+    random.setstate((version, tuple(internal), gauss_next))
+
+    name, keys, pos, has_gauss, cached_gaussian = state["numpy"]
+    np.random.set_state(
+        (name, np.array(keys, dtype=np.uint32), pos, has_gauss, cached_gaussian)
+    )
+
+    if "chain" in state:
+        if getattr(chain, "rng", None) is None:
+            raise ValueError("The checkpoint has a chain RNG, but the chain doesn't.")
+        version, internal, gauss_next = state["chain"]
+        chain.rng.setstate((version, tuple(internal), gauss_next))
+
+
+def partition_parts(partition: Any) -> List[List[Any]]:
+    """The districts of a partition, as [label, nodes] pairs in the partition's order."""
+
+    return [[part, list(nodes)] for part, nodes in partition.parts.items()]
+
+
+def resume_chain(chain: Any, checkpoint: Dict[str, Any]) -> None:
+    """Put a chain set up from the checkpointed plan back where the checkpoint left it."""
+
+    initial: Any = chain.initial_state
+    parts: Dict[Any, frozenset] = {
+        part: frozenset(nodes) for part, nodes in checkpoint["parts"]
+    }
+    if set().union(*parts.values()) != set(initial.graph.nodes):
+        raise ValueError("The checkpointed plan doesn't match the chain's graph.")
+
+    chain.initial_state = type(initial)(
+        initial.graph, assignment=Assignment(parts), updaters=initial.updaters
+    )
+    restore_rng_state(checkpoint["rng"], chain)
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    """Write a checkpoint, replacing the previous one only once it's complete."""
+
+    tmp: str = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        checkpoint: Dict[str, Any] = json.load(f)
+
+    # JSON keys are strings
+    checkpoint["reincarnateds"] = {
+        int(k): v for k, v in checkpoint["reincarnateds"].items()
+    }
+
+    return checkpoint
+
+
+def checkpoint_plan(checkpoint: Dict[str, Any]) -> List[Dict[str, str | int]]:
+    """The checkpointed plan, as a starting plan for prep_data()."""
+
+    return [
+        {"GEOID": geoid, "DISTRICT": district}
+        for geoid, district in checkpoint["plan"].items()
+    ]
+
+
+### END ###
@@ -2,7 +2,7 @@
 GENERATE AN ENSEMBLE OF MAPS using RECOM
 """
 
-from typing import Any, List, Dict, Set
+from typing import Any, List, Dict, Set, Iterable, Optional
 
 import sys
 from collections import defaultdict, Counter
@@ -11,6 +11,9 @@ from gerrychain.partition.assignment import Assignment
 
 from rdabase import time_function
 
+from ..general import EnsembleSink
+from .checkpoint import rng_state, partition_parts, resume_chain, save_checkpoint
+
 
 @time_function
 def run_unbiased_chain(
@@ -22,8 +25,26 @@ def run_unbiased_chain(
     random_start: bool = False,  # So district offsets can be adjusted
     burn_in: int = 0,
     sample: int = 0,
+    sink: Optional[EnsembleSink] = None,  # Write plans here instead of returning them
+    checkpoint: Optional[str] = None,  # Path to save checkpoints to
+    checkpoint_every: int = 1000,  # Plans kept between checkpoints
+    resume: Optional[Dict[str, Any]] = None,  # A checkpoint to pick up from
+    packed: bool = False,  # Keep only the precincts that changed districts
+    keyframe_every: int = 100,  # Keep a full plan every so many plans, when packed
 ) -> List[Dict[str, str | float | Dict[str, int | str]]]:
-    """Run a Markov chain."""
+    """Run a Markov chain.
+
+    If a sink is given, each plan is written to it as soon as it's kept, and the
+    plans are not accumulated in memory (the list returned is empty).
+
+    If packed, each plan is the delta from the previous one, as in a packed
+    ensemble, taken from the nodes the step flipped. Every keyframe_every-th plan
+    is a full plan, marked as a keyframe.
+
+    To resume from a checkpoint, set up the chain from the checkpointed plan. It's
+    put back exactly where the checkpoint left it, so it yields the same plans as
+    a chain that was never stopped.
+    """
 
     assert burn_in == 0, "Don't burn-in."
     assert sample == 0, "Don't sample."
@@ -36,7 +57,26 @@ def run_unbiased_chain(
     prev_districts: Set = set()
     reincarnateds = Counter()
 
-    for step, partition in enumerate(chain):
+    prev_partition: Any = None
+    prev_plan: Dict[str, int | str] = dict()
+
+    first_step: int = 0
+    if resume is not None:
+        first_step = resume["step"]
+        plans_kept = resume["plans_kept"]
+        past_districts = set(resume["past_districts"])
+        prev_districts = set(resume["prev_districts"])
+        reincarnateds = Counter(resume["reincarnateds"])
+        district_offset = resume["district_offset"]
+        resume_chain(chain, resume)
+        prev_plan = resume["plan"]
+        print(f"Resuming at  {first_step:06d}        ...", file=logfile)
+
+    for step, partition in enumerate(chain, first_step):
+        if resume is not None and step == first_step:
+            prev_partition = partition
+            continue  # The checkpointed plan, which was already kept
+
         if burn_in > 0:
             if step < burn_in:
                 print(f"Burning in   {step:06d}        ...")
@@ -56,7 +96,8 @@ def run_unbiased_chain(
 
         # TODO - Maybe handle duplicate plan.
 
-        geoids_by_district: List[Set[str]] = group_keys_by_value(plan)
+        # Hash node ids, not GEOIDs, so the hashes are the same in every process.
+        geoids_by_district: List[Set[int]] = group_keys_by_value(assignments)
         curr_districts: Set[int] = {hash_set(d) for d in geoids_by_district}
 
         not_in_prev: Set[int] = curr_districts - prev_districts
@@ -86,12 +127,44 @@ def run_unbiased_chain(
         #######################################################################
 
         plan_name: str = f"{plans_kept:04d}"
+        kept: Dict[str, Any] = {"name": plan_name, "plan": plan}  # No weights.
+        if packed:
+            if plans_kept % keyframe_every == 0:
+                kept["keyframe"] = True
+            else:
+                kept["plan"] = plan_delta(
+                    partition, prev_partition, plan, prev_plan, back_map
+                )
+        prev_partition = partition
+        prev_plan = plan
+
         plans_kept += 1
-        plans.append({"name": plan_name, "plan": plan})  # No weights.
+        if sink is not None:
+            sink.write(kept)
+        else:
+            plans.append(kept)
 
         print(f"Keeping plan {step:06d} ({plan_name}) ...")
         print(f"Keeping plan {step:06d} ({plan_name}) ...", file=logfile)
 
+        if checkpoint and plans_kept % checkpoint_every == 0:
+            if sink is not None:
+                sink.flush()
+            save_checkpoint(
+                checkpoint,
+                {
+                    "step": step,
+                    "plans_kept": plans_kept,
+                    "plan": plan,
+                    "parts": partition_parts(partition),
+                    "district_offset": district_offset,
+                    "rng": rng_state(chain),
+                    "reincarnateds": dict(reincarnateds),
+                    "past_districts": list(past_districts),
+                    "prev_districts": list(prev_districts),
+                },
+            )
+
         if plans_kept >= keep:
             break
 
@@ -101,6 +174,26 @@ def run_unbiased_chain(
     return plans
 
 
+def plan_delta(
+    partition,
+    prev_partition,
+    plan: Dict[str, int | str],
+    prev_plan: Dict[str, int | str],
+    back_map: Dict[int, str],
+) -> Dict[str, int | str]:
+    """The precincts whose districts changed from the previous plan."""
+
+    if partition is prev_partition:
+        return dict()  # The proposal was rejected, so the plan didn't change.
+
+    candidates: Iterable[str] = plan.keys()
+    flips: Optional[Dict] = getattr(partition, "flips", None)
+    if flips is not None and getattr(partition, "parent", None) is prev_partition:
+        candidates = (back_map[node] for node in flips)
+
+    return {geoid: plan[geoid] for geoid in candidates if plan[geoid] != prev_plan[geoid]}
+
+
 def hash_set(s):
     return hash(frozenset(s))
 
@@ -4,6 +4,7 @@ SETUP AN UNBIASED RECOM CHAIN
 
 from typing import Any, List, Dict, Tuple, Callable, NamedTuple
 
+import random
 from functools import partial
 
 from gerrychain import (
@@ -156,6 +157,10 @@ def setup_unbiased_markov_chain(
         initial_state=initial_partition,
         total_steps=size,
     )
+    # Newer GerryChains draw from the chain's own generator, not the random module.
+    # Seed it from the random module, so the chain is reproducible from its seed.
+    if hasattr(chain, "rng"):
+        chain.rng = random.Random(random.getrandbits(64))
 
     return chain, config
 
@@ -1,6 +1,7 @@
 # rdaensemble/rmfrst/__init__.py
 
-from .random_map import random_map
-from .ensemble import gen_rmfrst_ensemble
+from .random_map import random_map, cut_strategies
+from .ensemble import gen_rmfrst_ensemble, gen_rmfrst_plans
+from .batch import RandomMapJob, random_map_jobs, run_random_map_jobs
 
 name = "rmfrst"
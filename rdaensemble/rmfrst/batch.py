@@ -0,0 +1,193 @@
+"""
+GENERATE A 'RANDOM' (SEED) MAP FOR MANY STATE & PLAN TYPE COMBINATIONS
+"""
+
+from typing import Any, List, Dict, NamedTuple
+
+import os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from rdabase import (
+    DISTRICTS_BY_STATE,
+    starting_seed,
+    load_data,
+    load_graph,
+    write_csv,
+    mkAdjacencies,
+    populations,
+    Graph,
+)
+
+from ..ust import CSRGraph, mkCSRGraph
+from .ensemble import gen_rmfrst_plans
+
+
+class RandomMapJob(NamedTuple):
+    xx: str
+    plan_type: str
+    ndistricts: int
+    roughly_equal: float
+    prefix: str  # E.g., NC20C
+    excluded: bool
+
+
+def random_map_jobs(
+    states_with_data: List[str],
+    exclude: List[str],
+    mmd: Dict[str, List[str]],
+) -> List[RandomMapJob]:
+    """List the state & plan type combinations that need a random map."""
+
+    jobs: List[RandomMapJob] = list()
+
+    for xx, districts_by_type in DISTRICTS_BY_STATE.items():
+        if xx not in states_with_data:
+            continue
+
+        for plan_type, ndistricts in districts_by_type.items():
+            if ndistricts is None or ndistricts == 1:
+                continue
+
+            if xx in mmd and plan_type in mmd[xx]:
+                continue
+
+            roughly_equal: float = 0.01 if plan_type == "congress" else 0.10
+            prefix: str = f"{xx}20{plan_type[0].upper()}"
+
+            jobs.append(
+                RandomMapJob(
+                    xx, plan_type, ndistricts, roughly_equal, prefix, xx in exclude
+                )
+            )
+
+    return jobs
+
+
+def run_random_map_jobs(
+    jobs: List[RandomMapJob],
+    data_dir: str,  # E.g., ../rdabase/data
+    output_dir: str,
+    log_dir: str,
+    *,
+    workers: int = 1,
+) -> List[Dict[str, Any]]:
+    """Generate the random maps for a list of jobs, in a pool of worker processes.
+
+    Each job is a separate task, so a state's plan types run in parallel too.
+    Jobs are submitted state by state, and each worker keeps the graph of the
+    last state it loaded, so a state's inputs are rarely loaded more than once
+    per worker. A job that fails -- including when its state's inputs can't be
+    loaded -- gets a failed row, and the other jobs carry on.
+    Returns a summary of the seeds used and the time taken by each job.
+    """
+
+    summary: List[Dict[str, Any]] = list()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_random_map_job, job, data_dir, output_dir, log_dir)
+            for job in sorted(jobs, key=lambda job: job.xx)
+        ]
+        for future in as_completed(futures):
+            row: Dict[str, Any] = future.result()
+            print(
+                f"{row['state']} {row['plan_type']}: {row['status']} in {row['seconds']:.1f} seconds"
+            )
+            summary.append(row)
+
+    order: Dict[str, int] = {job.prefix: i for i, job in enumerate(jobs)}
+    summary.sort(key=lambda row: order[row["prefix"]])
+
+    return summary
+
+
+### HELPERS FOR RUNNING JOBS IN WORKER PROCESSES ###
+
+worker_state: Dict[str, Any] = dict()
+
+
+def state_graph(xx: str, data_dir: str) -> CSRGraph:
+    """The population-weighted graph for a state, loading it if it isn't the last one."""
+
+    if worker_state.get("xx") != xx:
+        worker_state.clear()
+        data: Dict[str, Dict[str, int | str]] = load_data(
+            os.path.join(data_dir, xx, f"{xx}_2020_data.csv")
+        )
+        graph: Dict[str, List[str]] = load_graph(
+            os.path.join(data_dir, xx, f"{xx}_2020_graph.json")
+        )
+        worker_state["csr"] = mkCSRGraph(mkAdjacencies(Graph(graph)), populations(data))
+        worker_state["xx"] = xx
+
+    return worker_state["csr"]
+
+
+def run_random_map_job(
+    job: RandomMapJob,
+    data_dir: str,
+    output_dir: str,
+    log_dir: str,
+) -> Dict[str, Any]:
+    """Generate the random map for a job, returning its row of the summary."""
+
+    xx: str = job.xx
+    row: Dict[str, Any] = {
+        "prefix": job.prefix,
+        "state": xx,
+        "plan_type": job.plan_type,
+        "ndistricts": job.ndistricts,
+        "roughly_equal": job.roughly_equal,
+        "starting_seed": None,
+        "seed": None,
+        "seeds_used": None,
+        "seconds": 0.0,
+        "status": "failed",
+    }
+
+    tic: float = time.perf_counter()
+    try:
+        seed: int = starting_seed(xx, job.ndistricts)
+        row["starting_seed"] = seed
+
+        csr: CSRGraph = state_graph(xx, data_dir)
+
+        plans: List[Dict[str, str | float | Dict[str, int | str]]]
+        seeds: List[int]
+        log_path: str = os.path.join(log_dir, f"{job.prefix}_random_log.txt")
+        with open(log_path, "w") as f:
+            plans, seeds = gen_rmfrst_plans(
+                1,
+                seed,
+                None,
+                None,
+                job.ndistricts,
+                f,
+                roughly_equal=job.roughly_equal,
+                csr=csr,
+            )
+
+        plan_dict: Dict[str, int | str] = plans[0]["plan"]  # type: ignore
+        plan: List[Dict[str, str | int]] = [
+            {"GEOID": geoid, "DISTRICT": district}
+            for geoid, district in plan_dict.items()
+        ]
+        write_csv(
+            os.path.join(output_dir, f"{job.prefix}_random_plan.csv"),
+            plan,
+            ["GEOID", "DISTRICT"],
+        )
+
+        row["seed"] = seeds[0]
+        row["seeds_used"] = seeds[0] - seed + 1
+        row["status"] = "done"
+
+    except Exception as e:
+        row["status"] = f"failed: {e}"
+
+    row["seconds"] = time.perf_counter() - tic
+
+    return row
+
+
+### END ###
@@ -2,7 +2,11 @@
 GENERATE AN ENSEMBLE OF RANDOM MAPS from RANDOM SPANNING TREES (RMfRST)
 """
 
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple, Iterator, Optional
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import count
 
 from rdabase import (
     mkAdjacencies,
@@ -13,49 +17,112 @@ from rdabase import (
     calc_population_deviation,
 )
 
+from ..ust import CSRGraph, mkCSRGraph
 from .random_map import random_map
 
+SeedResult = Tuple[int, Optional[List[Assignment]], str]  # seed, map, failure
+
 
 def gen_rmfrst_ensemble(
     size: int,  # Number of random maps to generate
     seed: int,  # Starting random seed
-    data: Dict[str, Dict[str, int | str]],
-    graph: Dict[str, List[str]],
+    data: Optional[Dict[str, Dict[str, int | str]]],
+    graph: Optional[Dict[str, List[str]]],
     N: int,  # Number of districts
     logfile,
     *,
     roughly_equal: float = 0.01,
+    cut_strategy: str = "closest",
+    workers: int = 1,  # Try seeds in parallel in this many processes
     verbose: bool = False,
+    csr: Optional[CSRGraph] = None,  # E.g., StateInputs.csr(), instead of data & graph
 ) -> List[Dict[str, str | float | Dict[str, int | str]]]:
-    """Generate an ensemble of random maps from random spanning trees."""
+    """Generate an ensemble of random maps from random spanning trees.
+
+    Seeds are consumed in order, whatever the number of workers, so the
+    ensemble only depends on the starting seed and size.
+
+    Given a population-weighted CSR graph (e.g., memory-mapped from cached
+    inputs), the data & graph dicts aren't needed.
+    """
+
+    plans: List[Dict[str, str | float | Dict[str, int | str]]]
+    plans, _ = gen_rmfrst_plans(
+        size,
+        seed,
+        data,
+        graph,
+        N,
+        logfile,
+        roughly_equal=roughly_equal,
+        cut_strategy=cut_strategy,
+        workers=workers,
+        verbose=verbose,
+        csr=csr,
+    )
+
+    return plans
+
+
+def gen_rmfrst_plans(
+    size: int,  # Number of random maps to generate
+    seed: int,  # Starting random seed
+    data: Optional[Dict[str, Dict[str, int | str]]],
+    graph: Optional[Dict[str, List[str]]],
+    N: int,  # Number of districts
+    logfile,
+    *,
+    roughly_equal: float = 0.01,
+    cut_strategy: str = "closest",
+    workers: int = 1,
+    verbose: bool = False,
+    csr: Optional[CSRGraph] = None,
+) -> Tuple[List[Dict[str, str | float | Dict[str, int | str]]], List[int]]:
+    """Generate random maps as gen_rmfrst_ensemble() does, with the seed of each."""
 
     start: int = seed
     plans: List[Dict[str, str | float | Dict[str, int | str]]] = list()
+    seeds: List[int] = list()
 
-    pairs: List[Tuple[str, str]] = mkAdjacencies(Graph(graph))
+    if csr is None:
+        if data is None or graph is None:
+            raise ValueError("Either data & graph or a CSR graph are required.")
+        csr = mkCSRGraph(mkAdjacencies(Graph(graph)), populations(data))
 
-    pop_by_geoid: Dict[str, int] = populations(data)
+    pop_by_geoid: Dict[str, int] = dict(zip(csr.ids, csr.weights.tolist()))
     total_pop: int = total_population(pop_by_geoid)
 
+    options: Dict[str, Any] = {
+        "roughly_equal": roughly_equal
+        / 2,  # Note: a different definitions of 'roughly equal'
+        "cut_strategy": cut_strategy,
+    }
+    results: Iterator[SeedResult]
+    if workers > 1:
+        results = map_seeds_in_parallel(
+            start, workers, (csr, pop_by_geoid, N, options)
+        )
+    else:
+        init_worker(csr, pop_by_geoid, N, options)
+        results = (map_seed(s) for s in count(start))
+
     conforming_count: int = 0
 
-    while True:
-        print(f"... {conforming_count} ...")
-        print(
-            f"Conforming count: {conforming_count}, random seed: {seed}", file=logfile
-        )
+    try:
+        for seed, assignments, failure in results:
+            print(f"... {conforming_count} ...")
+            print(
+                f"Conforming count: {conforming_count}, random seed: {seed}",
+                file=logfile,
+            )
 
-        plan_name: str = f"{conforming_count:03d}_{seed}"
+            plan_name: str = f"{conforming_count:03d}_{seed}"
 
-        try:
-            assignments: List[Assignment] = random_map(
-                pairs,
-                pop_by_geoid,
-                N,
-                seed,
-                roughly_equal=roughly_equal
-                / 2,  # Note: a different definitions of 'roughly equal'
-            )  # Generate a random contiguous & 'roughly' equal population partitioning of the state.
+            if assignments is None:
+                print(failure, file=logfile)
+                if verbose:
+                    print(failure)
+                continue
 
             popdev: float = calc_population_deviation(
                 assignments, pop_by_geoid, total_pop, N
@@ -69,29 +136,86 @@ def gen_rmfrst_ensemble(
             conforming_count += 1
             plan: Dict[str, int | str] = {a.geoid: a.district for a in assignments}
             plans.append({"name": plan_name, "plan": plan})  # No weights.
+            seeds.append(seed)
 
             if conforming_count == size:
                 break
 
-        except Exception as e:
-            print(f"Failure: {e}", file=logfile)
-            if verbose:
-                print(f"Failure: {e}")
-
-        except:
-            print("Unknown error.", file=logfile)
-            if verbose:
-                print("Unknown error.")
-
-        finally:
-            seed += 1
+    finally:
+        results.close()  # type: ignore
 
     print(
         f"{conforming_count} conforming plans took {seed - start + 1} random seeds.",
         file=logfile,
     )
+    print(f"Random seeds consumed: {start} to {seed}.", file=logfile)
 
-    return plans
+    return plans, seeds
+
+
+### HELPERS FOR GENERATING MAPS IN WORKER PROCESSES ###
+
+worker_state: Dict[str, Any] = dict()
+
+
+def init_worker(
+    csr: CSRGraph,
+    pop_by_geoid: Dict[str, int],
+    N: int,
+    options: Dict[str, Any],
+) -> None:
+    """Give a worker process the graph once."""
+
+    worker_state["pop_by_geoid"] = pop_by_geoid
+    worker_state["graph"] = csr
+    worker_state["N"] = N
+    worker_state["options"] = options
+
+
+def map_seed(seed: int) -> SeedResult:
+    """Generate a random map for a seed, or describe why that failed."""
+
+    try:
+        # Generate a random contiguous & 'roughly' equal population partitioning of the state.
+        # The graph is prebuilt, so the adjacencies aren't needed.
+        assignments: List[Assignment] = random_map(
+            [],
+            worker_state["pop_by_geoid"],
+            worker_state["N"],
+            seed,
+            graph=worker_state["graph"],
+            **worker_state["options"],
+        )
+        return seed, assignments, ""
+
+    except Exception as e:
+        return seed, None, f"Failure: {e}"
+
+    except:
+        return seed, None, "Unknown error."
+
+
+def map_seeds_in_parallel(
+    start: int, workers: int, initargs: Tuple
+) -> Iterator[SeedResult]:
+    """Generate maps for seeds start, start + 1, ... in a process pool, yielding them in seed order."""
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=initargs
+    ) as executor:
+        pending: deque[Future] = deque(
+            executor.submit(map_seed, start + i) for i in range(2 * workers)
+        )
+        next_seed: int = start + len(pending)
+        try:
+            while True:
+                result: SeedResult = pending.popleft().result()
+                pending.append(executor.submit(map_seed, next_seed))
+                next_seed += 1
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
 
 
 ### END ###
@@ -6,12 +6,28 @@ This code is adapted from Todd Proebsting's early work in the `ensembles` projec
 He wrote most of the code which I only lightly edited to make it work in this context.
 """
 
-import random
 from typing import List, Dict, Tuple, Set, Optional
 
+import numpy as np
+
 from rdabase import Assignment
 
-from ..ust import Node, Graph, Tree, RandomTree, mkSubsetGraph
+from ..ust import (
+    BlockRNG,
+    CSRGraph,
+    CSRTree,
+    RemainderGraph,
+    RandomRemainderTree,
+    mkCSRGraph,
+)
+
+
+# How to choose a cut from a spanning tree:
+# - closest: the cut closest to the target, if it's acceptable
+# - closest_acceptable: the acceptable cut closest to the target
+# - random_acceptable: an acceptable cut chosen uniformly at random
+# With either of the latter two, a new tree is only drawn when no cut is acceptable.
+cut_strategies: List[str] = ["closest", "closest_acceptable", "random_acceptable"]
 
 
 def random_map(
@@ -22,15 +38,24 @@ def random_map(
     *,
     roughly_equal: float = 0.01,
     attempts_per_seed: int = 1000,
+    block: int = 4096,  # Random words drawn at a time; the map doesn't depend on it
+    cut_strategy: str = "closest",
+    graph: Optional[CSRGraph] = None,  # Prebuilt from the adjacencies & populations
 ) -> List[Assignment]:
     """Generate a random map with N contiguous, 'roughly equal' population districts."""
 
-    random.seed(seed)
+    if cut_strategy not in cut_strategies:
+        raise ValueError(f"Unknown cut strategy ({cut_strategy})")
+
+    rng: BlockRNG = BlockRNG(seed, block=block)
 
     total_population: int = sum(populations.values())
     target_population: int = int(total_population / N)
 
-    remainder: Graph = mkGraph(adjacencies, populations)
+    if graph is None:
+        graph = mkCSRGraph(adjacencies, populations)
+    remainder: RemainderGraph = RemainderGraph(graph)
+    geoids: List[str] = remainder.graph.ids
 
     assignments: Dict[str, int] = {}
     district: int = 1
@@ -45,14 +70,15 @@ def random_map(
                 # so the process should eventually succeed.
 
             # Calculate the population yet to be assigned.
-            remaining_population = sum(populations[node.id] for node in remainder.nodes)
+            remaining_population = remainder.population
             if remaining_population < target_population * 1.5:  # hack
                 break
 
             # Get a spanning tree.
-            spanning: Tree = RandomTree(remainder)
-            spanning.compute_weight()
-            cuts: list[Tree] = spanning.all_subtrees()
+            spanning: CSRTree = RandomRemainderTree(remainder, rng)
+            cuts: np.ndarray = spanning.cuts(remainder.graph.weights)
+            if len(cuts) == 0:
+                continue
 
             # # Sort the cuts by their deviation from the target population, and
             # # then filter out the ones that wouldn't yield 'roughly equal' population.
@@ -79,33 +105,33 @@ def random_map(
             current_target_total = target_population * district
             assigned_so_far = total_population - remaining_population
             this_target = current_target_total - assigned_so_far
-            cut = min(cuts, key=lambda x: abs(x.subtree_weight - this_target))
             #### New code ends here ####
 
-            # If the deviation of the district would be too large, try again.
-            deviation = abs(cut.subtree_weight - target_population) / target_population
-            if deviation > roughly_equal:
-                continue
-
-            # If the deviation of the remaining population would be too large, try again.
-            deviation = (
-                abs(
-                    (remaining_population - cut.subtree_weight) / (N - district)
-                    - target_population
-                )
-                / target_population
+            # Choose a cut that leaves both the district and the remaining population
+            # 'roughly equal'. If there isn't one, try again.
+            chosen: Optional[int] = choose_cut(
+                cuts,
+                this_target,
+                target_population,
+                remaining_population,
+                N - district,
+                roughly_equal,
+                cut_strategy,
+                rng,
             )
-            if deviation > roughly_equal:
+            if chosen is None:
                 continue
+            cut: int = int(cuts[chosen, 0])
 
             # The cut is good ...
 
             # Assign the GEOIDs in the chosen cut to the current district.
-            assign_district(cut, district, assignments)
+            cleaved: np.ndarray = spanning.subtree(cut)
+            assign_district(geoids, cleaved, district, assignments)
 
-            # Increment the district, partition the graph, and repeat.
+            # Increment the district, remove it from the graph, and repeat.
             district += 1
-            _, remainder = partition(spanning, cut)
+            remainder.remove(cleaved)
 
         # Must handle the last district, which may have a bad size.
 
@@ -118,8 +144,7 @@ def random_map(
             raise Exception(
                 "The population deviation of the last district ({deviation}) would be too big."
             )
-        cut: Tree = RandomTree(remainder)
-        assign_district(cut, district, assignments)
+        assign_district(geoids, remainder.nodes(), district, assignments)
         break
 
     # note that this may not generate N districts due to spanning tree issues.
@@ -138,31 +163,53 @@ def random_map(
     return plan
 
 
-def mkGraph(adjacencies: List[Tuple[str, str]], populations: Dict[str, int]):
-    nodes: Dict[str, Node] = {
-        geoid: Node(geoid, populations[geoid], set()) for geoid in populations.keys()
-    }
-    for a, b in adjacencies:
-        nodes[a].neighbors.add(nodes[b])
-        nodes[b].neighbors.add(nodes[a])
-    graph: Graph = Graph(frozenset(nodes.values()))
-    return graph
-
-
-def partition(root: Tree, cut: Tree) -> tuple[Graph, Graph]:
-    remainder_nodes: set[Node] = set(c.node for c in root.all_subtrees_above(cut))
-    cleaved_nodes: set[Node] = set(c.node for c in cut.all_subtrees())
-    remainder: Graph = mkSubsetGraph(remainder_nodes)
-    cleaved: Graph = mkSubsetGraph(cleaved_nodes)
-    assert len(remainder.nodes) + len(cleaved.nodes) == root.nodecount()
-    return cleaved, remainder
-
-
-def assign_district(cut: Tree, district: int, assignments: Dict[str, int]):
-    assert cut.node.id not in assignments
-    assignments[cut.node.id] = district
-    for child in cut.children:
-        assign_district(child, district, assignments)
+def choose_cut(
+    cuts: np.ndarray,
+    this_target: int,
+    target_population: int,
+    remaining_population: int,
+    remaining_districts: int,
+    roughly_equal: float,
+    cut_strategy: str,
+    rng: BlockRNG,
+) -> Optional[int]:
+    """Choose a row of (node, subtree weight) cuts, or None if none are acceptable."""
+
+    weights: np.ndarray = cuts[:, 1]
+
+    # The deviation of the district & of the average remaining district for each cut
+    district_deviation: np.ndarray = (
+        np.abs(weights - target_population) / target_population
+    )
+    remaining_deviation: np.ndarray = (
+        np.abs((remaining_population - weights) / remaining_districts - target_population)
+        / target_population
+    )
+    acceptable: np.ndarray = (district_deviation <= roughly_equal) & (
+        remaining_deviation <= roughly_equal
+    )
+    distance: np.ndarray = np.abs(weights - this_target)
+
+    if cut_strategy == "closest":
+        closest: int = int(np.argmin(distance))
+        return closest if acceptable[closest] else None
+
+    candidates: np.ndarray = np.flatnonzero(acceptable)
+    if len(candidates) == 0:
+        return None
+
+    if cut_strategy == "closest_acceptable":
+        return int(candidates[np.argmin(distance[candidates])])
+
+    return int(candidates[rng.below(len(candidates))])
+
+
+def assign_district(
+    geoids: List[str], nodes: np.ndarray, district: int, assignments: Dict[str, int]
+):
+    for i in nodes.tolist():
+        assert geoids[i] not in assignments
+        assignments[geoids[i]] = district
 
 
 ### END ###
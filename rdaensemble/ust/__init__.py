@@ -1,5 +1,15 @@
 # rdaensemble/ust/__init__.py
 
 from .ust import Node, Graph, Tree, RandomTree, mkSubsetGraph
+from .ust import BlockRNG, RandomCSRTree, RandomCSRTreeRoot, RandomRemainderTree
+from .csr import (
+    CSRGraph,
+    CSRTree,
+    RemainderGraph,
+    mkCSRGraph,
+    mkCSRTree,
+    Graph2CSR,
+    CSR2Graph,
+)
 
 name = "ust"
@@ -0,0 +1,253 @@
+"""
+COMPACT (CSR) GRAPHS & SPANNING TREES
+
+Nodes are numbered 0 to n-1. The neighbors of node i are
+indices[indptr[i]:indptr[i + 1]], and weights[i] is its population.
+"""
+
+from typing import Dict, List, Tuple, NamedTuple
+
+import numpy as np
+
+from .graph import Node, Graph
+
+
+class CSRGraph(NamedTuple):
+    ids: List[str]  # Node offset -> id, e.g., GEOID
+    indptr: np.ndarray  # int64, n + 1 offsets into indices
+    indices: np.ndarray  # int32, both directions of each edge
+    weights: np.ndarray  # int64, population by node
+
+    def nodecount(self) -> int:
+        return len(self.ids)
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i] : self.indptr[i + 1]]
+
+    def check(self) -> None:
+        n: int = self.nodecount()
+        assert len(self.indptr) == n + 1
+        assert len(self.weights) == n
+        assert self.indptr[-1] == len(self.indices)
+        if len(self.indices) > 0:
+            assert 0 <= self.indices.min() and self.indices.max() < n
+
+    def subgraph(self, nodes: np.ndarray) -> "CSRGraph":
+        """The subgraph induced by the nodes, renumbered in the order given."""
+
+        nodes = np.asarray(nodes, dtype=np.int64)
+        renumber: np.ndarray = np.full(self.nodecount(), -1, dtype=np.int64)
+        renumber[nodes] = np.arange(len(nodes))
+
+        # Gather the neighbor blocks of the nodes, then drop edges that leave the subset.
+        rows, neighbors = gather(self.indptr, self.indices, nodes)
+        neighbors = renumber[neighbors]
+        inside: np.ndarray = neighbors >= 0
+
+        indptr: np.ndarray = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[inside], minlength=len(nodes)), out=indptr[1:])
+
+        return CSRGraph(
+            [self.ids[i] for i in nodes.tolist()],
+            indptr,
+            neighbors[inside].astype(np.int32),
+            self.weights[nodes],
+        )
+
+
+class CSRTree(NamedTuple):
+    root: int
+    parent: np.ndarray  # Parent of each node; -1 for the root & nodes not in the tree
+    order: np.ndarray  # Nodes in breadth-first order from the root
+    levels: np.ndarray  # Offsets into order where each depth starts
+
+    def nodecount(self) -> int:
+        return len(self.order)
+
+    def level(self, depth: int) -> np.ndarray:
+        return self.order[self.levels[depth] : self.levels[depth + 1]]
+
+    def compute_weight(self, weights: np.ndarray) -> np.ndarray:
+        """The total weight of the subtree rooted at each node."""
+
+        # Accumulate children into parents, from the deepest level up.
+        subtree_weight: np.ndarray = weights.astype(np.int64)
+        for depth in range(len(self.levels) - 2, 0, -1):
+            nodes: np.ndarray = self.level(depth)
+            np.add.at(subtree_weight, self.parent[nodes], subtree_weight[nodes])
+
+        return subtree_weight
+
+    def cuts(self, weights: np.ndarray) -> np.ndarray:
+        """(node, subtree weight) rows for every edge cut, i.e., every node but the root."""
+
+        nodes: np.ndarray = self.order[1:]
+
+        return np.column_stack((nodes, self.compute_weight(weights)[nodes]))
+
+    def subtree(self, node: int) -> np.ndarray:
+        """The nodes in the subtree rooted at the node."""
+
+        inside: np.ndarray = np.zeros(len(self.parent), dtype=bool)
+        inside[node] = True
+        for depth in range(1, len(self.levels) - 1):
+            nodes: np.ndarray = self.level(depth)
+            inside[nodes] |= inside[self.parent[nodes]]
+
+        return np.flatnonzero(inside)
+
+
+def mkCSRTree(parent: np.ndarray, root: int) -> CSRTree:
+    """Make a spanning tree from a parent array, ordering its nodes level by level."""
+
+    n: int = len(parent)
+    members: np.ndarray = np.flatnonzero(parent >= 0)
+    children: np.ndarray = members[np.argsort(parent[members], kind="stable")]
+    child_ptr: np.ndarray = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(parent[children], minlength=n), out=child_ptr[1:])
+
+    frontier: np.ndarray = np.array([root], dtype=np.int64)
+    by_level: List[np.ndarray] = []
+    while len(frontier) > 0:
+        by_level.append(frontier)
+        _, frontier = gather(child_ptr, children, frontier)
+
+    levels: np.ndarray = np.zeros(len(by_level) + 1, dtype=np.int64)
+    np.cumsum([len(nodes) for nodes in by_level], out=levels[1:])
+
+    return CSRTree(root, parent, np.concatenate(by_level), levels)
+
+
+class RemainderGraph:
+    """A CSR graph that nodes can be removed from in place.
+
+    The active neighbors of each node are kept at the front of its block of
+    neighbors, so removing nodes only touches the blocks of their neighbors.
+    """
+
+    graph: CSRGraph
+    active: np.ndarray
+    starts: List[int]
+    degrees: List[int]  # Active neighbors only
+    indices: List[int]
+    population: int
+
+    def __init__(self, graph: CSRGraph) -> None:
+        self.graph = graph
+        self.active = np.ones(graph.nodecount(), dtype=bool)
+        self.starts = graph.indptr[:-1].tolist()
+        self.degrees = graph.degrees().tolist()
+        self.indices = graph.indices.tolist()
+        self.population = int(graph.weights.sum())
+
+    def nodes(self) -> np.ndarray:
+        return np.flatnonzero(self.active)
+
+    def remove(self, nodes: np.ndarray) -> None:
+        """Remove the nodes, in time proportional to the sum of their degrees."""
+
+        self.active[nodes] = False
+        self.population -= int(self.graph.weights[nodes].sum())
+
+        starts: List[int] = self.starts
+        degrees: List[int] = self.degrees
+        indices: List[int] = self.indices
+        for v in nodes.tolist():
+            for u in indices[starts[v] : starts[v] + degrees[v]]:
+                if not self.active[u]:
+                    continue
+                # Swap v with the last active neighbor of u, and shrink u's block.
+                last: int = starts[u] + degrees[u] - 1
+                i: int = indices.index(v, starts[u], last + 1)
+                indices[i], indices[last] = indices[last], indices[i]
+                degrees[u] -= 1
+            degrees[v] = 0
+
+
+def mkCSRGraph(
+    adjacencies: List[Tuple[str, str]], populations: Dict[str, int]
+) -> CSRGraph:
+    """Make a CSR graph from pairs of adjacent GEOIDs & populations by GEOID."""
+
+    ids: List[str] = list(populations.keys())
+    offset_by_id: Dict[str, int] = {id: i for i, id in enumerate(ids)}
+    src: np.ndarray = np.array(
+        [offset_by_id[a] for a, _ in adjacencies], dtype=np.int64
+    )
+    dst: np.ndarray = np.array(
+        [offset_by_id[b] for _, b in adjacencies], dtype=np.int64
+    )
+    weights: np.ndarray = np.array(
+        [populations[id] for id in ids], dtype=np.int64
+    )
+
+    return _from_edges(ids, src, dst, weights)
+
+
+def Graph2CSR(graph: Graph) -> CSRGraph:
+    """Convert a Node/Graph graph to a CSR graph, numbering the nodes in id order."""
+
+    nodes: List[Node] = sorted(graph.nodes, key=lambda n: n.id)
+    offset_by_node: Dict[Node, int] = {n: i for i, n in enumerate(nodes)}
+    pairs: List[Tuple[int, int]] = [
+        (offset_by_node[n], offset_by_node[neighbor])
+        for n in nodes
+        for neighbor in n.neighbors
+    ]
+    src: np.ndarray = np.array([a for a, _ in pairs], dtype=np.int64)
+    dst: np.ndarray = np.array([b for _, b in pairs], dtype=np.int64)
+    weights: np.ndarray = np.array([n.weight for n in nodes], dtype=np.int64)
+
+    return _from_edges([n.id for n in nodes], src, dst, weights)
+
+
+def CSR2Graph(csr: CSRGraph) -> Graph:
+    """Convert a CSR graph back to a Node/Graph graph."""
+
+    nodes: List[Node] = [
+        Node(id, int(weight), set()) for id, weight in zip(csr.ids, csr.weights)
+    ]
+    indptr: List[int] = csr.indptr.tolist()
+    indices: List[int] = csr.indices.tolist()
+    for i, n in enumerate(nodes):
+        n.neighbors.update(nodes[j] for j in indices[indptr[i] : indptr[i + 1]])
+
+    return Graph(frozenset(nodes))
+
+
+def gather(
+    indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The concatenated neighbor blocks of the rows, and the row position of each entry."""
+
+    starts: np.ndarray = indptr[rows]
+    counts: np.ndarray = indptr[rows + 1] - starts
+    positions: np.ndarray = np.repeat(np.arange(len(rows)), counts)
+    offsets: np.ndarray = np.arange(counts.sum()) - np.repeat(
+        np.cumsum(counts) - counts, counts
+    )
+
+    return positions, indices[np.repeat(starts, counts) + offsets]
+
+
+def _from_edges(
+    ids: List[str], src: np.ndarray, dst: np.ndarray, weights: np.ndarray
+) -> CSRGraph:
+    """Symmetrize, de-duplicate & sort a list of edges into CSR form."""
+
+    n: int = len(ids)
+    keep: np.ndarray = src != dst
+    both_src: np.ndarray = np.concatenate((src[keep], dst[keep]))
+    both_dst: np.ndarray = np.concatenate((dst[keep], src[keep]))
+    keys: np.ndarray = np.unique(both_src * n + both_dst)  # Sorted by source, then destination
+
+    indptr: np.ndarray = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+
+    return CSRGraph(ids, indptr, (keys % n).astype(np.int32), weights)
+
+
+### END ###
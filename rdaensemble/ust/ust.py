@@ -1,7 +1,10 @@
-from typing import Optional
+from typing import List, Optional
 import random
 
+import numpy as np
+
 from .graph import Node, Graph, Tree, mkSubsetGraph
+from .csr import CSRGraph, CSRTree, RemainderGraph, mkCSRTree
 
 
 # Generating Random Spanning Trees More Quickly than the Cover Time
@@ -48,4 +51,97 @@ def RandomTree(graph: Graph) -> Tree:
     return t
 
 
+WORD_RANGE: int = 1 << 64
+
+
+class BlockRNG:
+    """Exactly uniform random integers, drawn from 64-bit words generated in blocks.
+
+    Each draw consumes whole words in order, so a given seed produces the same
+    values whatever the block size; block=1 draws one word at a time.
+    """
+
+    words: List[int]
+    pos: int
+
+    def __init__(self, seed: Optional[int] = None, *, block: int = 4096) -> None:
+        assert block > 0
+        self.bits: np.random.BitGenerator = np.random.PCG64(seed)
+        self.block = block
+        self.words = []
+        self.pos = 0
+
+    def below(self, n: int) -> int:
+        """A random integer in [0, n)."""
+
+        # Reject the words above the largest multiple of n, so x % n is unbiased.
+        limit: int = WORD_RANGE - WORD_RANGE % n
+        while True:
+            if self.pos == len(self.words):
+                self.words = self.bits.random_raw(self.block).tolist()
+                self.pos = 0
+            x: int = self.words[self.pos]
+            self.pos += 1
+            if x < limit:
+                return x % n
+
+
+# Wilson's algorithm again, on integer node offsets and CSR adjacency:
+# each step of a walk is a random index into the node's block of neighbors.
+def Wilson(
+    units: List[int],
+    r: int,
+    starts: List[int],
+    degrees: List[int],
+    indices: List[int],
+    rng: BlockRNG,
+) -> CSRTree:
+    below = rng.below
+
+    InTree: List[bool] = [False] * len(starts)
+    Next: List[int] = [-1] * len(starts)
+    InTree[r] = True
+    for i in units:
+        u: int = i
+        while not InTree[u]:
+            Next[u] = indices[starts[u] + below(degrees[u])]
+            u = Next[u]
+        u = i
+        while not InTree[u]:
+            InTree[u] = True
+            u = Next[u]
+
+    return mkCSRTree(np.array(Next, dtype=np.int64), r)
+
+
+def RandomCSRTreeRoot(graph: CSRGraph, r: int, rng: BlockRNG) -> CSRTree:
+    return Wilson(
+        list(range(graph.nodecount())),
+        r,
+        graph.indptr[:-1].tolist(),
+        graph.degrees().tolist(),
+        graph.indices.tolist(),
+        rng,
+    )
+
+
+def RandomCSRTree(graph: CSRGraph, rng: Optional[BlockRNG] = None) -> CSRTree:
+    if rng is None:
+        rng = BlockRNG(random.getrandbits(64))  # Follow random.seed()
+    graph.check()
+    root: int = rng.below(graph.nodecount())
+    t: CSRTree = RandomCSRTreeRoot(graph, root, rng)
+    return t
+
+
+# A spanning tree of the nodes that remain, without copying the graph.
+def RandomRemainderTree(remainder: RemainderGraph, rng: BlockRNG) -> CSRTree:
+    units: List[int] = remainder.nodes().tolist()
+    root: int = units[rng.below(len(units))]
+    t: CSRTree = Wilson(
+        units, root, remainder.starts, remainder.degrees, remainder.indices, rng
+    )
+    return t
+
+
 ### END ###
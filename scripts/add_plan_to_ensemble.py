@@ -33,11 +33,9 @@ warnings.warn = lambda *args, **kwargs: None
 from rdabase import (
     require_args,
     read_csv,
-    read_json,
-    write_json,
 )
 
-from rdaensemble import plan_from_ensemble, make_plan
+from rdaensemble import plan_from_ensemble, make_plan, read_ensemble, write_ensemble
 
 
 def main() -> None:
@@ -45,7 +43,7 @@ def main() -> None:
 
     #
 
-    ensemble: Dict[str, Any] = read_json(args.plans)
+    ensemble: Dict[str, Any] = read_ensemble(args.plans)
 
     if "packed" in ensemble and ensemble["packed"] == True:
         raise Exception(f"Ensemble ({args.plans}) is packed. Unpack it first.")
@@ -64,7 +62,7 @@ def main() -> None:
     ensemble["size"] += 1
 
     if not args.debug:
-        write_json(args.plans, ensemble)
+        write_ensemble(args.plans, ensemble)
 
 
 def parse_args():
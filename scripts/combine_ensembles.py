@@ -30,14 +30,23 @@ warnings.warn = lambda *args, **kwargs: None
 
 from rdabase import (
     require_args,
-    read_json,
-    write_json,
 )
 
-from rdaensemble import ensemble_metadata
+from rdaensemble import (
+    EnsembleSummary,
+    summarize_ensemble,
+    check_geoids,
+    combine_ensembles,
+)
 
 
 def main() -> None:
+    """Combine the plans from multiple ensembles.
+
+    The plans are streamed from each ensemble to the output a plan at a time, so the
+    combined ensemble is never held in memory. Packed ensembles are unpacked as they're read.
+    """
+
     args: argparse.Namespace = parse_args()
 
     ensemble_files: List[str] = (
@@ -50,29 +59,17 @@ def main() -> None:
     for e in ensemble_files:
         print(f"- {e}")
 
-    combined_ensemble: Dict[str, Any] = {}
-    combined_ensemble["packed"] = False
-    combined_ensemble["method"] = "Combining multiple independently generated ensembles"
-
-    plans: List[Dict[str, str | float | Dict[str, int | str]]] = []
-    total_size: int = 0
-
-    for i, e in enumerate(ensemble_files):
-        ensemble: Dict[str, Any] = read_json(e)
-
-        if "packed" in ensemble and ensemble["packed"] == True:
-            raise Exception(f"Ensemble ({e}) is packed. Unpack it first.")
-
-        print(f"Ensemble {e} has {len(ensemble['plans'])} plans.")
-        total_size += len(ensemble["plans"])
-        if len(ensemble["plans"]) > 0:
-            plans.extend(ensemble["plans"])
+    summaries: List[EnsembleSummary] = list()
+    for e in ensemble_files:
+        summary: EnsembleSummary = summarize_ensemble(e)
+        print(f"Ensemble {e} has {summary.size} plans.")
+        summaries.append(summary)
 
-    combined_ensemble["size"] = total_size
-    combined_ensemble["plans"] = plans
+    check_geoids(summaries)
 
     if not args.debug:
-        write_json(args.output, combined_ensemble)
+        combined: Dict[str, Any] = combine_ensembles(summaries, args.output)
+        print(f"Combined ensemble has {combined['size']} plans.")
 
 
 # def list_of_strings(arg):
@@ -90,7 +87,7 @@ def parse_args():
     parser.add_argument(
         "--output",
         type=str,
-        help="The JSON file to write the combined ensemble to",
+        help="The JSON, JSON Lines or binary .ens file to write the combined ensemble to",
     )
 
     parser.add_argument(
@@ -27,7 +27,9 @@ from os import listdir
 from os.path import isfile, join
 import datetime
 
-from rdabase import require_args, read_json, read_csv, write_json
+from rdabase import require_args, read_csv
+
+from rdaensemble import read_ensemble, write_ensemble
 
 GeoID: TypeAlias = str
 DistrictID: TypeAlias = int | str
@@ -39,7 +41,7 @@ def main() -> None:
 
     args: argparse.Namespace = parse_args()
 
-    existing_ensemble: Dict[str, Any] = read_json(args.base)
+    existing_ensemble: Dict[str, Any] = read_ensemble(args.base)
     plans: List[Dict[str, str | float | Dict[str, int | str]]] = []
     # = existing_ensemble["plans"]
 
@@ -76,7 +78,7 @@ def main() -> None:
     new_ensemble["date_created"] = timestamp.strftime("%x")
     new_ensemble["time_created"] = timestamp.strftime("%X")
 
-    write_json(args.plans, new_ensemble)
+    write_ensemble(args.plans, new_ensemble)
 
     pass
 
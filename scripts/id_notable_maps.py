@@ -19,7 +19,7 @@ $ scripts/id_notable_maps.py -h
 
 import argparse
 from argparse import ArgumentParser, Namespace
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Tuple
 
 import warnings
 
@@ -27,12 +27,19 @@ warnings.warn = lambda *args, **kwargs: None
 
 import os, csv
 
+import numpy as np
+
 from rdabase import (
     require_args,
     read_json,
     write_json,
 )
-from rdaensemble import id_notable_maps
+from rdaensemble import (
+    id_notable_maps_from_ratings,
+    ratings_dimensions,
+    is_parquet_scores,
+    read_parquet_columns,
+)
 
 
 def main() -> None:
@@ -40,8 +47,20 @@ def main() -> None:
 
     args: argparse.Namespace = parse_args()
 
-    scores: List[Dict[str, Any]] = read_scores(args.scores)
-    metadata: Dict[str, Any] = read_json(args.metadata)
+    # Just the map names & ratings are read. Parquet scores carry their own metadata.
+    names: List[str]
+    ratings: np.ndarray
+    metadata: Dict[str, Any]
+    if is_parquet_scores(args.scores):
+        columns: Dict[str, np.ndarray]
+        metadata, columns = read_parquet_columns(
+            args.scores, ["map"] + ratings_dimensions
+        )
+        names = columns["map"].tolist()
+        ratings = np.column_stack([columns[m] for m in ratings_dimensions])
+    else:
+        names, ratings = read_ratings(args.scores)
+        metadata = read_json(args.metadata)
 
     filter: bool = not args.nofilter
     filters: List[int] = (
@@ -58,25 +77,35 @@ def main() -> None:
 
     output: Dict[str, Any] = metadata
     output["plans"] = os.path.basename(args.scores)
-    notable_maps: Dict[str, Any] = id_notable_maps(scores, filters)
+    notable_maps: Dict[str, Any] = id_notable_maps_from_ratings(
+        names, ratings, filters
+    )
     output.update(notable_maps)
 
     write_json(args.notables, output)
 
 
-def read_scores(input: str) -> List[Dict[str, Any]]:
-    """Read the scores from a CSV file.
+def read_ratings(input: str) -> Tuple[List[str], np.ndarray]:
+    """Read the map names & ratings from a scores CSV file.
 
     map, ..., proportionality,competitiveness,minority,compactness,splitting
     """
 
     with open(input, "r") as f:
-        scores: List[Dict[str, Any]] = []
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header: List[str] = next(reader)
+        i: int = header.index("map")
+        js: List[int] = [header.index(m) for m in ratings_dimensions]
+
+        names: List[str] = list()
+        ratings: List[List[str]] = list()
         for row in reader:
-            scores.append(row)
+            names.append(row[i])
+            ratings.append([row[j] for j in js])
 
-        return scores
+    return names, np.array(ratings, dtype=str).astype(np.int64).reshape(
+        -1, len(ratings_dimensions)
+    )
 
 
 def parse_args():
@@ -87,12 +116,12 @@ def parse_args():
     parser.add_argument(
         "--scores",
         type=str,
-        help="Ensemble of scores in a CSV file",
+        help="Ensemble of scores in a CSV file (or a .parquet directory)",
     )
     parser.add_argument(
         "--metadata",
         type=str,
-        help="Metadata JSON for the scoring CSV",
+        help="Metadata JSON for the scoring CSV (not needed for Parquet scores)",
     )
     parser.add_argument(
         "--notables",
@@ -121,6 +150,8 @@ def parse_args():
         "metadata": "../../iCloud/fileout/ensembles/NC20C_scores_metadata.json",
         "notables": "../../iCloud/fileout/ensembles/NC20C_notable_maps.json",
     }
+    if not args.debug and args.scores and is_parquet_scores(args.scores):
+        del debug_defaults["metadata"]  # It's in the Parquet scores
     args = require_args(args, args.debug, debug_defaults)
 
     return args
@@ -35,10 +35,9 @@ from rdabase import (
     read_csv,
     load_data,
     load_metadata,
-    write_json,
 )
 
-from rdaensemble import ensemble_metadata
+from rdaensemble import ensemble_metadata, write_ensemble
 
 
 def main() -> None:
@@ -79,7 +78,7 @@ def main() -> None:
         ensemble["plans"].append(plan)
 
     if not args.debug:
-        write_json(args.plans, ensemble)
+        write_ensemble(args.plans, ensemble)
 
 
 def get_matching_files(dir: str, template: str) -> List[str]:
@@ -1,19 +1,39 @@
 #!/usr/bin/env python3
 
 """
-MAKE A SCRIPT TO GENERATE A 'RANDOM' (SEED) MAP FOR EACH STATE & PLAN TYPE COMBINATION
+GENERATE A 'RANDOM' (SEED) MAP FOR EACH STATE & PLAN TYPE COMBINATION
 
-To run:
+For example:
 
-$ scripts/make_random_maps.py
+$ scripts/make_random_maps.py \
+--data ../rdabase/data \
+--output random_maps \
+--logs temp \
+--summary temp/random_maps_summary.csv \
+--workers 4 \
+--no-debug
+
+To print the equivalent bash script (one scripts/random_map.py call per map) instead:
+
+$ scripts/make_random_maps.py --script
+
+For documentation, type:
+
+$ scripts/make_random_maps.py -h
 
 """
 
-from typing import List, Dict
+import argparse
+from argparse import ArgumentParser, Namespace
+from typing import Any, List, Dict
 
-import os
+import warnings
 
-from rdabase import DISTRICTS_BY_STATE
+warnings.warn = lambda *args, **kwargs: None
+
+from rdabase import require_args, write_csv
+
+from rdaensemble import RandomMapJob, random_map_jobs, run_random_map_jobs
 
 states_with_data: List[str] = [
     "AL",
@@ -63,31 +83,118 @@ exclude: List[str] = [
 
 mmd: Dict[str, List[str]] = {"MD": ["lower"]}
 
-print("#!/bin/bash")
 
-for xx, districts_by_type in DISTRICTS_BY_STATE.items():
-    if xx not in states_with_data:
-        continue
+def main() -> None:
+    args: argparse.Namespace = parse_args()
+
+    jobs: List[RandomMapJob] = random_map_jobs(states_with_data, exclude, mmd)
+
+    if args.script:
+        print_script(jobs)
+        return
 
-    comment: str = "# " if xx in exclude else ""
+    jobs = [job for job in jobs if not job.excluded]
+    print(f"Generating {len(jobs)} random maps ...")
 
-    for plan_type, ndistricts in districts_by_type.items():
-        if ndistricts is None or ndistricts == 1:
-            continue
+    summary: List[Dict[str, Any]] = run_random_map_jobs(
+        jobs, args.data, args.output, args.logs, workers=args.workers
+    )
 
-        if xx in mmd and plan_type in mmd[xx]:
-            continue
+    if not summary:
+        print("No random maps to generate.")
+        return
 
-        roughly_equal: float = 0.01 if plan_type == "congress" else 0.10
-        prefix: str = f"{xx}20{plan_type[0].upper()}"
+    fields: List[str] = list(summary[0].keys())
+    write_csv(args.summary, summary, fields, precision="{:.2f}")
 
-        command: str = f"{comment}echo 'Running {xx} {plan_type} {ndistricts} ...'"
+
+def print_script(jobs: List[RandomMapJob]) -> None:
+    """Print a bash script that generates each random map in a separate process."""
+
+    print("#!/bin/bash")
+
+    for job in jobs:
+        xx: str = job.xx
+        plan_type: str = job.plan_type
+        prefix: str = job.prefix
+        comment: str = "# " if job.excluded else ""
+
+        command: str = (
+            f"{comment}echo 'Running {xx} {plan_type} {job.ndistricts} ...'"
+        )
         print(command)
 
         command: str = (
-            f"{comment}scripts/random_map.py --state {xx} --plantype {plan_type} --roughlyequal {roughly_equal} --data ../rdabase/data/{xx}/{xx}_2020_data.csv --shapes ../rdabase/data/{xx}/{xx}_2020_shapes_simplified.json --graph ../rdabase/data/{xx}/{xx}_2020_graph.json --output temp/{prefix}_random_plan.csv --log temp/{prefix}_random_log.txt --no-debug"
+            f"{comment}scripts/random_map.py --state {xx} --plantype {plan_type} --roughlyequal {job.roughly_equal} --data ../rdabase/data/{xx}/{xx}_2020_data.csv --shapes ../rdabase/data/{xx}/{xx}_2020_shapes_simplified.json --graph ../rdabase/data/{xx}/{xx}_2020_graph.json --output temp/{prefix}_random_plan.csv --log temp/{prefix}_random_log.txt --no-debug"
         )
         print(command)
-        # os.system(command)
+
+
+def parse_args():
+    parser: ArgumentParser = argparse.ArgumentParser(
+        description="Generate a random map for each state & plan type combination."
+    )
+
+    parser.add_argument(
+        "--data",
+        type=str,
+        default="../rdabase/data",
+        help="Directory with the data & graph files by state",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="random_maps",
+        help="Directory to write the plan CSVs to",
+    )
+    parser.add_argument(
+        "--logs",
+        type=str,
+        default="temp",
+        help="Directory to write the log TXTs to",
+    )
+    parser.add_argument(
+        "--summary",
+        type=str,
+        help="Summary CSV of the seeds used & the time taken by each map",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes to generate maps in",
+    )
+    parser.add_argument(
+        "--script",
+        dest="script",
+        action="store_true",
+        help="Print a bash script that generates the maps instead",
+    )
+
+    parser.add_argument(
+        "-v", "--verbose", dest="verbose", action="store_true", help="Verbose mode"
+    )
+
+    # Enable debug/explicit mode
+    parser.add_argument("--debug", default=True, action="store_true", help="Debug mode")
+    parser.add_argument(
+        "--no-debug", dest="debug", action="store_false", help="Explicit mode"
+    )
+
+    args: Namespace = parser.parse_args()
+
+    # Default values for args in debug mode
+    debug_defaults: Dict[str, Any] = {
+        "output": "temp",
+        "summary": "temp/random_maps_summary.csv",
+        "workers": 1,
+    }
+    args = require_args(args, args.debug, debug_defaults)
+
+    return args
+
+
+if __name__ == "__main__":
+    main()
 
 ### END ###
@@ -7,7 +7,7 @@ For example:
 
 $ scripts/pack_ensemble.py \
 --input ../../iCloud/fileout/tradeoffs/NC/ensembles/NC20C_plans.json \
---output temp/NC20C_plans_packed.json \
+--output temp/NC20C_plans_packed.jsonl \
 --no-debug
 
 For documentation, type:
@@ -19,13 +19,18 @@ $ scripts/pack_ensemble.py -h
 import argparse
 from argparse import ArgumentParser, Namespace
 
-from typing import List, Dict, Any, Optional, TypeAlias
+from typing import Dict, Any, Iterator, TypeAlias
 
 
 from rdabase import (
     require_args,
-    read_json,
-    write_json,
+)
+
+from rdaensemble import (
+    stream_ensemble,
+    pack_plans,
+    open_ensemble_writer,
+    is_binary_ensemble,
 )
 
 GeoID: TypeAlias = str
@@ -42,44 +47,31 @@ def main() -> None:
     """Pack the plans of an ensemble to reduce the size on disk.
 
     NOTE - Packing depends on successive plans being mutations of previous plans!
-    """
 
-    args: argparse.Namespace = parse_args()
-
-    ensemble: Dict[str, Any] = read_json(args.input)
-    plans: List[Dict[str, Name | Weight | Dict[GeoID, DistrictID]]] = ensemble["plans"]
+    Every so often, a full plan is written as a keyframe, so any plan can be
+    decoded without replaying the deltas from the start of the ensemble.
 
-    packed_ensemble: Dict[str, Any] = {
-        k: v for k, v in ensemble.items() if k != "plans"
-    }
-    packed_ensemble["packed"] = True
-    packed_plans: List[Dict[str, Name | Weight | Dict[GeoID, DistrictID]]] = []
-    packed_plans.append(plans[0])
+    The plans are read, packed & written one at a time, so the ensemble is
+    never held in memory.
 
-    prev: Dict[GeoID, DistrictID] = plans[0]["plan"]  # type: ignore
-
-    for unpacked_plan in plans[1:]:
-        name: str = unpacked_plan["name"]  # type: ignore
-        weight: Optional[float] = (
-            unpacked_plan["weight"] if "weight" in unpacked_plan else None
-        )  # type: ignore
-        next: Dict[GeoID, DistrictID] = unpacked_plan["plan"]  # type: ignore
+    Write JSON Lines (.jsonl) to read plans by position or name later without
+    loading the whole ensemble: only JSON Lines ensembles have an offset index.
+    A packed JSON ensemble is loaded whole to read any plan from it.
+    """
 
-        delta: Dict[GeoID, DistrictID] = {
-            k: next[k] for k in next if next[k] != prev[k]
-        }  # Assumes that the set of keys are the same
-        packed_plan: Dict[str, Name | Weight | Dict[GeoID, DistrictID]] = (
-            {"name": name, "weight": weight, "plan": delta}
-            if weight is not None
-            else {"name": name, "plan": delta}
-        )
+    args: argparse.Namespace = parse_args()
 
-        packed_plans.append(packed_plan)
-        prev = next
+    if is_binary_ensemble(args.output):
+        raise ValueError("Packed ensembles can only be written as JSON.")
 
-    packed_ensemble["plans"] = packed_plans
+    metadata: Dict[str, Any]
+    plans: Iterator[Dict[str, Name | Weight | Dict[GeoID, DistrictID]]]
+    metadata, plans = stream_ensemble(args.input)
+    metadata["packed"] = True
 
-    write_json(args.output, packed_ensemble)
+    with open_ensemble_writer(args.output, metadata) as writer:
+        for packed_plan in pack_plans(plans, keyframe_every=args.keyframeevery):
+            writer.write(packed_plan)
 
 
 def parse_args():
@@ -93,7 +85,13 @@ def parse_args():
     parser.add_argument(
         "--output",
         type=str,
-        help="The equivalent packed ensemble of plans",
+        help="The equivalent packed ensemble of plans (.jsonl can be read a plan at a time; .json is loaded whole)",
+    )
+    parser.add_argument(
+        "--keyframeevery",
+        type=int,
+        default=100,
+        help="Write every n-th plan in full, as a keyframe",
     )
     parser.add_argument(
         "-v", "--verbose", dest="verbose", action="store_true", help="Verbose mode"
@@ -110,7 +108,7 @@ def parse_args():
     # Default values for args in debug mode
     debug_defaults: Dict[str, Any] = {
         "input": "../../iCloud/fileout/tradeoffs/NC/ensembles/NC20C_plans.json",
-        "output": "temp/NC20C_plans_packed.json",
+        "output": "temp/NC20C_plans_packed.jsonl",
         "verbose": True,
     }
     args = require_args(args, args.debug, debug_defaults)
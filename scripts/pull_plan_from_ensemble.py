@@ -28,20 +28,22 @@ warnings.warn = lambda *args, **kwargs: None
 from rdabase import (
     require_args,
     Assignment,
-    read_json,
     write_csv,
 )
 
-from rdaensemble import plan_from_ensemble, make_plan
+from rdaensemble import (
+    plan_from_ensemble,
+    make_plan,
+    open_ensemble,
+    EnsembleSource,
+)
 
 
 def main() -> None:
     args: argparse.Namespace = parse_args()
 
-    ensemble: Dict[str, Any] = read_json(args.plans)
-
-    if "packed" in ensemble and ensemble["packed"] == True:
-        raise Exception(f"Ensemble ({args.plans}) is packed. Unpack it first.")
+    # Ensembles are indexed by plan name, so only the one plan is decoded.
+    ensemble: EnsembleSource = open_ensemble(args.plans)
 
     plan: List[Dict[str, str | int]] = plan_from_ensemble(args.id, ensemble)
 
@@ -56,7 +58,7 @@ def parse_args():
     parser.add_argument(
         "--plans",
         type=str,
-        help="Ensemble of plans",
+        help="Ensemble of plans in a JSON, JSON Lines or binary .ens file, packed or not",
     )
     parser.add_argument(
         "--id",
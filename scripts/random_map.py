@@ -24,7 +24,7 @@ $ scripts/random_map.py -h
 
 import argparse
 from argparse import ArgumentParser, Namespace
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 
 import warnings
 
@@ -42,14 +42,31 @@ from rdabase import (
     write_csv,
 )
 
-from rdaensemble import gen_rmfrst_ensemble, make_plan
+from rdaensemble import (
+    gen_rmfrst_ensemble,
+    cut_strategies,
+    make_plan,
+    StateInputs,
+    load_state_inputs,
+)
+from rdaensemble.ust import CSRGraph
 
 
 def main() -> None:
     args: argparse.Namespace = parse_args()
 
-    data: Dict[str, Dict[str, int | str]] = load_data(args.data)
-    graph: Dict[str, List[str]] = load_graph(args.graph)
+    # With cached inputs, the memory-mapped CSR graph is used directly.
+    data: Optional[Dict[str, Dict[str, int | str]]] = None
+    graph: Optional[Dict[str, List[str]]] = None
+    csr: Optional[CSRGraph] = None
+    if args.cache:
+        inputs: StateInputs = load_state_inputs(
+            args.data, args.graph, cache_dir=args.cache
+        )
+        csr = inputs.csr()
+    else:
+        data = load_data(args.data)
+        graph = load_graph(args.graph)
     # metadata: Dict[str, Any] = load_metadata(args.state, args.data)
 
     N: int = DISTRICTS_BY_STATE[args.state][args.plantype]
@@ -66,7 +83,10 @@ def main() -> None:
                 N,
                 f,
                 roughly_equal=args.roughlyequal,
+                cut_strategy=args.cutstrategy,
+                workers=args.workers,
                 verbose=args.verbose,
+                csr=csr,
             )
         )
 
@@ -111,6 +131,11 @@ def parse_args():
         type=str,
         help="Graph file",
     )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        help="Directory to cache the parsed data & graph in",
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -122,6 +147,19 @@ def parse_args():
         default=0.01,
         help="'Roughly equal' population threshold",
     )
+    parser.add_argument(
+        "--cutstrategy",
+        type=str,
+        default="closest",
+        choices=cut_strategies,
+        help="How to choose a cut",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes to generate maps in",
+    )
     parser.add_argument(
         "--log",
         type=str,
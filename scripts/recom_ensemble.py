@@ -49,6 +49,18 @@ $ scripts/recom_ensemble.py \
 --log temp/NC20L_log_DEBUG.txt \
 --no-debug
 
+$ scripts/recom_ensemble.py \
+--state NC \
+--plantype lower \
+--randomstart \
+--keep 100000 \
+--data ../rdabase/data/NC/NC_2020_data.csv \
+--graph ../rdabase/data/NC/NC_2020_graph.json \
+--plans temp/NC20L_plans.jsonl \
+--log temp/NC20L_log.txt \
+--resume \
+--no-debug
+
 $ scripts/recom_ensemble.py
 
 For documentation, type:
@@ -59,9 +71,9 @@ $ scripts/recom_ensemble.py -h
 
 import argparse
 from argparse import ArgumentParser, Namespace
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 
-import random
+import os, random
 
 import warnings
 
@@ -71,7 +83,6 @@ from rdabase import (
     require_args,
     starting_seed,
     read_csv,
-    write_json,
     load_data,
     load_graph,
     load_metadata,
@@ -81,6 +92,17 @@ from rdaensemble import (
     prep_data,
     setup_unbiased_markov_chain,
     run_unbiased_chain,
+    load_checkpoint,
+    checkpoint_plan,
+    StateInputs,
+    load_state_inputs,
+    EnsembleSink,
+    JSONLinesEnsembleWriter,
+    open_ensemble_writer,
+    is_lines_ensemble,
+    is_binary_ensemble,
+    copy_ensemble,
+    index_path,
 )
 
 
@@ -104,8 +126,43 @@ def main() -> None:
     if args.start:
         starting_plan = read_csv(args.start, [str, int])
 
-    data: Dict[str, Dict[str, int | str]] = load_data(args.data)
-    graph: Dict[str, List[str]] = load_graph(args.graph)
+    # The chain always writes JSON Lines, which are readable up to the last complete
+    # plan if the run is killed, and which a resumed chain appends to. Plans for a
+    # JSON or binary ensemble are copied to it when the chain finishes.
+    chain_plans: str = (
+        args.plans
+        if is_lines_ensemble(args.plans)
+        else os.path.splitext(args.plans)[0] + ".jsonl"
+    )
+
+    # Pick up a killed chain exactly where its last checkpoint left it, appending to
+    # its plans. The checkpoint is removed when the chain finishes.
+    checkpoint_path: str = (
+        args.checkpoint or os.path.splitext(args.plans)[0] + "_checkpoint.json"
+    )
+    resume: Optional[Dict[str, Any]] = None
+    random_start: bool = args.random_start
+    if args.resume:
+        resume = load_checkpoint(checkpoint_path)
+        if resume["plans_kept"] >= args.keep:
+            raise ValueError(
+                f"The checkpointed chain already kept {resume['plans_kept']} plans."
+            )
+        starting_plan = checkpoint_plan(resume)
+        random_start = False
+        chain_length = args.keep - resume["plans_kept"] + 1  # Incl. the checkpointed plan
+
+    data: Dict[str, Dict[str, int | str]]
+    graph: Dict[str, List[str]]
+    if args.cache:
+        inputs: StateInputs = load_state_inputs(
+            args.data, args.graph, cache_dir=args.cache
+        )
+        data = inputs.data()
+        graph = inputs.graph()
+    else:
+        data = load_data(args.data)
+        graph = load_graph(args.graph)
     metadata: Dict[str, Any] = load_metadata(args.state, args.data, args.plantype)
 
     N: int = int(metadata["D"])
@@ -122,12 +179,15 @@ def main() -> None:
     ensemble["plan_type"] = args.plantype.title()
     ensemble["burn_in"] = args.burnin
     ensemble["sample"] = args.sample
-    ensemble["packed"] = False
+    ensemble["packed"] = args.packed
+    assert not (
+        args.packed and is_binary_ensemble(args.plans)
+    ), "Packed ensembles can only be written as JSON or JSON Lines"
 
-    with open(args.log, "w") as f:
+    with open(args.log, "a" if resume else "w") as f:
         # Prepare the data
         recom_graph, elections, back_map = None, None, None
-        if args.random_start:
+        if random_start:
             recom_graph, elections, back_map = prep_data(data, graph)
         else:
             recom_graph, elections, back_map = prep_data(
@@ -141,22 +201,49 @@ def main() -> None:
             chain_length,
             recom_graph,
             elections,
-            random_start=args.random_start,
+            random_start=random_start,
         )
 
-        # Run the chain
-        plans: List[Dict[str, str | float | Dict[str, int | str]]] = run_unbiased_chain(
-            chain,
-            back_map,
-            f,
-            keep=args.keep,
-            random_start=args.random_start,  # So district offsets can be adjusted, when random_start
-        )
+        ensemble["parameters"] = repr(settings)
 
-    ensemble["parameters"] = repr(settings)
-    ensemble["plans"] = plans
-    if not args.debug:
-        write_json(args.plans, ensemble)
+        # Run the chain, writing plans to the ensemble file as they are kept
+        sink: Optional[EnsembleSink] = None
+        if resume:
+            sink = JSONLinesEnsembleWriter(
+                chain_plans, ensemble, append_after=resume["plans_kept"]
+            )
+        elif not args.debug:
+            sink = open_ensemble_writer(chain_plans, ensemble)
+        try:
+            run_unbiased_chain(
+                chain,
+                back_map,
+                f,
+                keep=args.keep,
+                random_start=random_start,  # So district offsets can be adjusted, when random_start
+                sink=sink,
+                checkpoint=(
+                    checkpoint_path if sink and args.checkpointevery > 0 else None
+                ),
+                checkpoint_every=args.checkpointevery,
+                resume=resume,
+                packed=args.packed,
+                keyframe_every=args.keyframeevery,
+            )
+        finally:
+            if sink is not None:
+                sink.close()
+
+    # The chain finished, so copy its plans to the requested format, and drop the
+    # checkpoint, which there's nothing left to resume from.
+    if sink is not None:
+        if chain_plans != args.plans:
+            copy_ensemble(chain_plans, args.plans)
+            os.remove(chain_plans)
+            if os.path.exists(index_path(chain_plans)):
+                os.remove(index_path(chain_plans))
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
 
 
 def parse_args():
@@ -200,16 +287,48 @@ def parse_args():
         type=str,
         help="Graph file",
     )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        help="Directory to cache the parsed data & graph in",
+    )
     parser.add_argument(
         "--plans",
         type=str,
-        help="Ensemble plans JSON file",
+        help="Ensemble plans JSON (or .jsonl or binary .ens) file; the chain writes .jsonl until it finishes",
     )
     parser.add_argument(
         "--log",
         type=str,
         help="Log TXT file",
     )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="Write each plan as the changes from the previous one",
+    )
+    parser.add_argument(
+        "--keyframeevery",
+        type=int,
+        default=100,
+        help="The number of plans between full plans, when packed",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        help="Checkpoint JSON file (default: next to the plans)",
+    )
+    parser.add_argument(
+        "--checkpointevery",
+        type=int,
+        default=1000,
+        help="The number of plans to keep between checkpoints (0 for none)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the chain exactly where its checkpoint left it, appending to the plans",
+    )
 
     parser.add_argument(
         "-v", "--verbose", dest="verbose", action="store_true", help="Verbose mode"
@@ -56,7 +56,6 @@ from rdabase import (
     require_args,
     starting_seed,
     read_csv,
-    write_json,
     load_data,
     load_graph,
     load_metadata,
@@ -66,6 +65,7 @@ from rdaensemble import (
     prep_data,
     setup_unbiased_markov_chain,
     run_unbiased_chain,
+    write_ensemble,
 )
 
 
@@ -140,7 +140,7 @@ def main() -> None:
     ensemble["parameters"] = repr(settings)
     ensemble["plans"] = plans
     if not args.debug:
-        write_json(args.plans, ensemble)
+        write_ensemble(args.plans, ensemble)
 
     pass
 
@@ -184,7 +184,7 @@ def parse_args():
     parser.add_argument(
         "--plans",
         type=str,
-        help="Ensemble plans JSON file",
+        help="Ensemble plans JSON (or binary .ens) file",
     )
     parser.add_argument(
         "--log",
@@ -44,7 +44,6 @@ from rdabase import (
     starting_seed,
     DISTRICTS_BY_STATE,
     read_csv,
-    write_json,
     load_data,
     load_shapes,
     load_graph,
@@ -62,6 +61,7 @@ from rdaensemble import (
     minority_dummy,
     compactness_proxy,
     splitting_proxy,
+    write_ensemble,
 )
 
 
@@ -176,7 +176,7 @@ def main() -> None:
     print()
 
     if not args.debug:
-        write_json(args.plans, ensemble)
+        write_ensemble(args.plans, ensemble)
 
 
 def parse_args():
@@ -216,7 +216,7 @@ def parse_args():
     parser.add_argument(
         "--plans",
         type=str,
-        help="Ensemble plans JSON file",
+        help="Ensemble plans JSON (or binary .ens) file",
     )
     parser.add_argument(
         "--roughlyequal",
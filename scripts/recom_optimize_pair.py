@@ -46,7 +46,6 @@ from rdabase import (
     census_fields,
     Assignment,
     read_csv,
-    write_json,
     load_data,
     load_shapes,
     load_graph,
@@ -64,6 +63,7 @@ from rdaensemble import (
     make_minority_proxy,
     optimization_metrics,
     make_combined_metric,
+    write_ensemble,
 )
 
 
@@ -193,7 +193,7 @@ def main() -> None:
     ensemble["size"] = len(plans)  # Not every optimization step is kept
 
     if not args.debug:
-        write_json(args.plans, ensemble)
+        write_ensemble(args.plans, ensemble)
 
     pass  # For debugging
 
@@ -234,7 +234,7 @@ def parse_args():
     parser.add_argument(
         "--plans",
         type=str,
-        help="The resulting ensemble JSON file",
+        help="The resulting ensemble JSON (or binary .ens) file",
     )
 
     parser.add_argument(
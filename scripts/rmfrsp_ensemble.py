@@ -33,14 +33,13 @@ from rdabase import (
     require_args,
     starting_seed,
     DISTRICTS_BY_STATE,
-    write_json,
     load_data,
     load_shapes,
     load_graph,
     load_metadata,
 )
 
-from rdaensemble import gen_rmfrsp_ensemble, ensemble_metadata
+from rdaensemble import gen_rmfrsp_ensemble, ensemble_metadata, write_ensemble
 
 
 def main() -> None:
@@ -82,7 +81,7 @@ def main() -> None:
 
     ensemble["plans"] = plans
 
-    write_json(args.plans, ensemble)
+    write_ensemble(args.plans, ensemble)
 
 
 def parse_args():
@@ -122,7 +121,7 @@ def parse_args():
     parser.add_argument(
         "--plans",
         type=str,
-        help="Ensemble plans JSON file",
+        help="Ensemble plans JSON (or binary .ens) file",
     )
     parser.add_argument(
         "--scores",
@@ -33,13 +33,17 @@ from rdabase import (
     require_args,
     starting_seed,
     DISTRICTS_BY_STATE,
-    write_json,
     load_data,
     load_graph,
     load_metadata,
 )
 
-from rdaensemble import gen_rmfrst_ensemble, ensemble_metadata
+from rdaensemble import (
+    gen_rmfrst_ensemble,
+    cut_strategies,
+    ensemble_metadata,
+    write_ensemble,
+)
 
 
 def main() -> None:
@@ -73,13 +77,15 @@ def main() -> None:
                 N,
                 f,
                 roughly_equal=args.roughlyequal,
+                cut_strategy=args.cutstrategy,
+                workers=args.workers,
                 verbose=args.verbose,
             )
         )
 
     ensemble["plans"] = plans
 
-    write_json(args.plans, ensemble)
+    write_ensemble(args.plans, ensemble)
 
 
 def parse_args():
@@ -119,7 +125,7 @@ def parse_args():
     parser.add_argument(
         "--plans",
         type=str,
-        help="Ensemble plans JSON file",
+        help="Ensemble plans JSON (or binary .ens) file",
     )
     parser.add_argument(
         "--scores",
@@ -137,6 +143,19 @@ def parse_args():
         default=0.01,
         help="'Roughly equal' population threshold",
     )
+    parser.add_argument(
+        "--cutstrategy",
+        type=str,
+        default="closest",
+        choices=cut_strategies,
+        help="How to choose a cut",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes to generate maps in",
+    )
 
     parser.add_argument(
         "-v", "--verbose", dest="verbose", action="store_true", help="Verbose mode"
@@ -40,9 +40,9 @@ $ scripts/score_ensemble.py -h
 
 """
 
-import argparse
+import os, shutil, argparse
 from argparse import ArgumentParser, Namespace
-from typing import Any, List, Dict, Callable
+from typing import Any, List, Dict, Callable, Optional
 
 import warnings
 
@@ -50,8 +50,6 @@ warnings.warn = lambda *args, **kwargs: None
 
 from rdabase import (
     require_args,
-    read_json,
-    write_csv,
     write_json,
     load_data,
     load_shapes,
@@ -61,6 +59,15 @@ from rdabase import (
 from rdaensemble import (
     score_ensemble,
     scores_metadata,
+    StateInputs,
+    load_state_inputs,
+    open_ensemble,
+    EnsembleSource,
+    ScoreSink,
+    open_score_store,
+    is_parquet_scores,
+    ScoreCache,
+    METRIC_FAMILIES,
 )
 
 ################################################################################
@@ -74,9 +81,20 @@ from rdaei import load_EI_votes, add_scores
 def main() -> None:
     args: argparse.Namespace = parse_args()
 
-    data: Dict[str, Dict[str, int | str]] = load_data(args.data)
-    shapes: Dict[str, Any] = load_shapes(args.shapes)
-    graph: Dict[str, List[str]] = load_graph(args.graph)
+    data: Dict[str, Dict[str, int | str]]
+    shapes: Dict[str, Any]
+    graph: Dict[str, List[str]]
+    if args.cache:
+        inputs: StateInputs = load_state_inputs(
+            args.data, args.graph, args.shapes, cache_dir=args.cache
+        )
+        data = inputs.data()
+        shapes = inputs.shapes()
+        graph = inputs.graph()
+    else:
+        data = load_data(args.data)
+        shapes = load_shapes(args.shapes)
+        graph = load_graph(args.graph)
     metadata: Dict[str, Any] = load_metadata(args.state, args.data, args.plantype)
 
     more_data: Dict[str, Any] = {}
@@ -91,30 +109,60 @@ def main() -> None:
 
     ###########################################################################
 
-    ensemble: Dict[str, Any] = read_json(args.plans)
-    plans: List[Dict[str, str | float | Dict[str, int | str]]] = ensemble["plans"]
-
-    if "packed" in ensemble and ensemble["packed"] == True:
-        raise Exception(f"Ensemble ({args.plans}) is packed. Unpack it first.")
-
-    scores: List[Dict] = score_ensemble(
-        plans,
-        data,
-        shapes,
-        graph,
-        metadata,
-        more_data=more_data,
-        more_scores_fn=more_scores_fn,
+    # Plans are decoded one at a time, so packed ensembles needn't be unpacked first.
+    ensemble: EnsembleSource = open_ensemble(args.plans)
+
+    score_metadata: Dict[str, Any] = scores_metadata(xx=args.state, plans=args.plans)
+
+    # Scores are appended to the scores CSV (or Parquet directory) as plans are scored,
+    # so an interrupted run can be restarted, skipping the plans already scored.
+    if args.rescore and not args.debug and os.path.isdir(args.scores):
+        shutil.rmtree(args.scores)
+    elif args.rescore and not args.debug and os.path.exists(args.scores):
+        os.remove(args.scores)
+    store: Optional[ScoreSink] = (
+        None
+        if args.debug
+        else open_score_store(args.scores, score_metadata, precision="{:.4f}")
+    )
+    if store is not None and len(store) > 0:
+        print(f"Skipping the {len(store)} plans already scored in {args.scores}.")
+
+    # Plans scored before with the same inputs, here or in other ensembles, are looked up.
+    cache: Optional[ScoreCache] = (
+        ScoreCache(args.scorecache, max_bytes=args.scorecachesize * 1024 * 1024)
+        if args.scorecache
+        else None
     )
 
-    metadata: Dict[str, Any] = scores_metadata(xx=args.state, plans=args.plans)
-    metadata_path: str = args.scores.replace(".csv", "_metadata.json")
-
-    fields: List[str] = list(scores[0].keys())
-
-    if not args.debug:
-        write_csv(args.scores, scores, fields, precision="{:.4f}")
-        write_json(metadata_path, metadata)
+    try:
+        scores: List[Dict] = score_ensemble(
+            ensemble,
+            data,
+            shapes,
+            graph,
+            metadata,
+            more_data=more_data,
+            more_scores_fn=more_scores_fn,
+            workers=args.workers,
+            incremental=args.incremental,
+            store=store,
+            cache=cache,
+            metrics=args.metrics,
+        )
+    finally:
+        if store is not None:
+            store.close()
+        if cache is not None:
+            if args.workers == 1:  # Workers count their own hits & misses
+                print(f"Score cache: {cache.hits} hits, {cache.misses} misses")
+            cache.close()
+
+    # Parquet scores carry their metadata in the part files' schema metadata.
+    metadata_path: str = os.path.splitext(args.scores)[0] + "_metadata.json"
+
+    if not args.debug and not is_parquet_scores(args.scores):
+        write_json(metadata_path, score_metadata)
 
     pass
 
@@ -138,7 +186,7 @@ def parse_args():
     parser.add_argument(
         "--plans",
         type=str,
-        help="Ensemble of plans to score in a JSON file",
+        help="Ensemble of plans to score in a JSON, JSON Lines or binary .ens file, packed or not",
     )
     parser.add_argument(
         "--data",
@@ -163,7 +211,47 @@ def parse_args():
     parser.add_argument(
         "--scores",
         type=str,
-        help="Ensemble of resulting scores to a CSV file",
+        help="Ensemble of resulting scores to a CSV file (or a .parquet directory)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        help="Directory to cache the parsed data, shapes & graph in",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes to score plans in",
+    )
+    parser.add_argument(
+        "--incremental",
+        dest="incremental",
+        action="store_true",
+        help="Reuse the results for districts already scored (e.g., for ReCom ensembles)",
+    )
+    parser.add_argument(
+        "--rescore",
+        dest="rescore",
+        action="store_true",
+        help="Rescore every plan, instead of skipping the plans already scored",
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        choices=METRIC_FAMILIES,
+        help="Only compute these families of metrics (default: all)",
+    )
+    parser.add_argument(
+        "--scorecache",
+        type=str,
+        help="A score cache (SQLite database) to reuse the scores of plans seen before",
+    )
+    parser.add_argument(
+        "--scorecachesize",
+        type=int,
+        default=256,
+        help="The maximum size of the score cache, in MB",
     )
 
     parser.add_argument(
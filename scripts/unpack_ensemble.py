@@ -19,15 +19,15 @@ $ scripts/unpack_ensemble.py -h
 import argparse
 from argparse import ArgumentParser, Namespace
 
-from typing import List, Dict, Any, Optional, TypeAlias
+from typing import Dict, Any, Iterator, TypeAlias
 
 
 from rdabase import (
     require_args,
-    read_json,
-    write_json,
 )
 
+from rdaensemble import stream_ensemble, open_ensemble_writer
+
 GeoID: TypeAlias = str
 DistrictID: TypeAlias = int | str
 
@@ -39,44 +39,22 @@ Weight: TypeAlias = float
 
 
 def main() -> None:
-    """Unpack the plans of a packed ensemble."""
-
-    args: argparse.Namespace = parse_args()
-
-    packed_ensemble: Dict[str, Any] = read_json(args.input)
-    packed_plans: List[Dict[str, Name | Weight | Dict[GeoID, DistrictID]]] = (
-        packed_ensemble["plans"]
-    )
+    """Unpack the plans of a packed ensemble.
 
-    unpacked_ensemble: Dict[str, Any] = {
-        k: v for k, v in packed_ensemble.items() if k != "plans"
-    }
-    unpacked_ensemble["packed"] = False
-    unpacked_plans: List[Dict[str, Name | Weight | Dict[GeoID, DistrictID]]] = []
-    unpacked_plans.append(packed_plans[0])
-
-    prev: Dict[GeoID, DistrictID] = packed_plans[0]["plan"]  # type: ignore
-
-    for packed_plan in packed_plans[1:]:
-        name: str = packed_plan["name"]  # type: ignore
-        weight: Optional[float] = (
-            packed_plan["weight"] if "weight" in packed_plan else None
-        )  # type: ignore
-        delta: Dict[GeoID, DistrictID] = packed_plan["plan"]  # type: ignore
+    The plans are read, unpacked & written one at a time, so the ensemble is
+    never held in memory.
+    """
 
-        prev.update(delta)
-        next: Dict[GeoID, DistrictID] = dict(prev)
-
-        unpacked_plan: Dict[str, Name | Weight | Dict[GeoID, DistrictID]] = (
-            {"name": name, "weight": weight, "plan": next}
-            if weight is not None
-            else {"name": name, "plan": next}
-        )
-        unpacked_plans.append(unpacked_plan)
+    args: argparse.Namespace = parse_args()
 
-    unpacked_ensemble["plans"] = unpacked_plans
+    metadata: Dict[str, Any]
+    plans: Iterator[Dict[str, Name | Weight | Dict[GeoID, DistrictID]]]
+    metadata, plans = stream_ensemble(args.input)
+    metadata["packed"] = False
 
-    write_json(args.output, unpacked_ensemble)
+    with open_ensemble_writer(args.output, metadata) as writer:
+        for unpacked_plan in plans:
+            writer.write(unpacked_plan)
 
 
 def parse_args():
@@ -27,6 +27,7 @@ setup(
         "rdaensemble.ust",
     ],
     # ext_modules=cythonize(cython_files, compiler_directives={"language_level": "3"}),
-    install_requires=["rdabase", "rdascore", "rdadccvt", "gerrychain", "cython"],
+    install_requires=["rdabase", "rdascore", "rdadccvt", "gerrychain", "numpy", "cython"],
+    extras_require={"parquet": ["pyarrow"]},
     zip_safe=False,
 )
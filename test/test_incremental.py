@@ -0,0 +1,190 @@
+"""
+TEST SCORING PLANS INCREMENTALLY
+
+analyze_plan_incrementally() must give exactly the scorecard that analyze_plan()
+does, for every subset of the metric families, whether a district's results are
+computed or come from the cache. So must analyze_plan_metrics(), which scores a
+subset of the families without the cache. The state is a small grid of square precincts
+in a few counties, with arcs between neighbors & along the state border, and the
+plans include ReCom-like successors that share districts with the plan before.
+"""
+
+from typing import Any, List, Dict, Tuple
+
+import random
+from itertools import combinations
+
+import pytest
+
+from rdabase import census_fields, election_fields, OUT_OF_STATE
+from rdascore import analyze_plan
+
+from rdaensemble.general import make_plan
+from rdaensemble.general.incremental import (
+    ANALYZE_FAMILIES,
+    DistrictCache,
+    analyze_plan_incrementally,
+)
+from rdaensemble.general.score import analyze_plan_metrics
+
+N: int = 8  # Precincts on a side
+D: int = 4  # Districts
+
+
+def geoid(r: int, c: int) -> str:
+    return f"37{1 + 2 * (r // 3):03d}{r:03d}{c:03d}"  # Counties of 3 rows
+
+
+def synthetic_state() -> Tuple[Dict, Dict, Dict, Dict]:
+    rng: random.Random = random.Random(42)
+
+    data: Dict[str, Dict[str, int | str]] = dict()
+    shapes: Dict[str, Any] = dict()
+    graph: Dict[str, List[str]] = {OUT_OF_STATE: []}
+
+    for r in range(N):
+        for c in range(N):
+            g: str = geoid(r, c)
+
+            vap: Dict[str, int] = {f: rng.randint(0, 60) for f in census_fields[2:-1]}
+            row: Dict[str, int | str] = {"GEOID": g, **vap}
+            row["MINORITY_VAP"] = sum(vap.values()) - vap["WHITE_VAP"]
+            row["TOTAL_VAP"] = sum(vap.values())
+            row["TOTAL_POP"] = row["TOTAL_VAP"] + rng.randint(0, 40)
+            row["REP_VOTES"] = rng.randint(10, 90)
+            row["DEM_VOTES"] = rng.randint(10, 90)
+            row["OTH_VOTES"] = rng.randint(0, 5)
+            row["TOT_VOTES"] = row["REP_VOTES"] + row["DEM_VOTES"] + row["OTH_VOTES"]
+            assert set(row) >= set(census_fields + election_fields)
+            data[g] = row
+
+            neighbors: List[str] = [
+                geoid(r + dr, c + dc)
+                for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]
+                if 0 <= r + dr < N and 0 <= c + dc < N
+            ]
+            arcs: Dict[str, float] = {n: 1.0 for n in neighbors}
+            on_border: int = 4 - len(neighbors)
+            if on_border:
+                neighbors.append(OUT_OF_STATE)
+                arcs[OUT_OF_STATE] = float(on_border)
+                graph[OUT_OF_STATE].append(g)
+            graph[g] = neighbors
+
+            shapes[g] = {
+                "center": [c + 0.5, r + 0.5],
+                "area": 1.0,
+                "arcs": arcs,
+                "exterior": [[c, r], [c + 1, r], [c + 1, r + 1], [c, r + 1]],
+            }
+
+    counties: List[str] = sorted({g[2:5] for g in data})
+    metadata: Dict[str, Any] = {
+        "D": D,
+        "C": len(counties),
+        "county_to_index": {county: i for i, county in enumerate(counties)},
+        "district_to_index": {d: d - 1 for d in range(1, D + 1)},
+    }
+
+    return data, shapes, graph, metadata
+
+
+def synthetic_plans() -> List[Dict[str, int | str]]:
+    columns: Dict[str, int | str] = {
+        geoid(r, c): 1 + (c * D) // N for r in range(N) for c in range(N)
+    }
+    # A ReCom-like step: districts 1 & 2 trade precincts, 3 & 4 are unchanged
+    step: Dict[str, int | str] = dict(columns)
+    for r in range(N // 2):
+        step[geoid(r, N // 4)] = 1
+    # Another, with the precincts in another order, so district 3 comes first
+    step2: Dict[str, int | str] = dict(step)
+    for r in range(N // 2, N):
+        step2[geoid(r, N // 4 - 1)] = 2
+    step2 = dict(sorted(step2.items(), key=lambda item: (item[1] != 3, item[0])))
+    rows: Dict[str, int | str] = {
+        geoid(r, c): 1 + (r * D) // N for r in range(N) for c in range(N)
+    }
+
+    return [columns, step, step2, rows, columns]
+
+
+def reference(assignments, data, shapes, graph, metadata, which) -> Dict[str, Any]:
+    """The scorecard from analyze_plan(), a family at a time but for all of them."""
+
+    if list(which) == ANALYZE_FAMILIES:
+        return analyze_plan(assignments, data, shapes, graph, metadata)
+
+    scorecard: Dict[str, Any] = dict()
+    by_district_metrics: List[List[Dict[str, float]]] = list()
+    for family in which:
+        family_scores: Dict[str, Any] = analyze_plan(
+            assignments, data, shapes, graph, metadata, which=family
+        )
+        by_district: List[Dict[str, float]] = family_scores.pop("by_district")
+        if by_district:
+            by_district_metrics.append(by_district)
+        scorecard.update(family_scores)
+    scorecard["by_district"] = [
+        {k: v for d in ds for k, v in d.items()} for ds in zip(*by_district_metrics)
+    ]
+
+    return scorecard
+
+
+SUBSETS: List[List[str]] = [
+    list(subset)
+    for n in range(1, len(ANALYZE_FAMILIES) + 1)
+    for subset in combinations(ANALYZE_FAMILIES, n)
+]
+
+
+@pytest.mark.parametrize("which", SUBSETS, ids=["+".join(s) for s in SUBSETS])
+def test_incremental_matches_analyze_plan(which) -> None:
+    data, shapes, graph, metadata = synthetic_state()
+    cache: DistrictCache = DistrictCache()
+
+    for plan in synthetic_plans():
+        assignments = make_plan(plan)
+        expected: Dict[str, Any] = reference(
+            assignments, data, shapes, graph, metadata, which
+        )
+        actual: Dict[str, Any] = analyze_plan_incrementally(
+            assignments, data, shapes, graph, metadata, cache, which=which
+        )
+
+        assert list(actual) == list(expected)
+        assert actual == expected
+
+    assert cache.hits > 0
+
+
+@pytest.mark.parametrize("which", SUBSETS, ids=["+".join(s) for s in SUBSETS])
+def test_plan_metrics_match_analyze_plan(which) -> None:
+    data, shapes, graph, metadata = synthetic_state()
+
+    for plan in synthetic_plans():
+        assignments = make_plan(plan)
+        expected: Dict[str, Any] = reference(
+            assignments, data, shapes, graph, metadata, which
+        )
+        actual: Dict[str, Any] = analyze_plan_metrics(
+            assignments, data, shapes, graph, metadata, which
+        )
+
+        assert list(actual) == list(expected)
+        assert actual == expected
+
+
+def test_incremental_rejects_plan_not_covering_graph() -> None:
+    data, shapes, graph, metadata = synthetic_state()
+    plan: Dict[str, int | str] = synthetic_plans()[0]
+    del plan[geoid(0, 0)]
+
+    with pytest.raises(ValueError):
+        analyze_plan_incrementally(
+            make_plan(plan), data, shapes, graph, metadata, DistrictCache()
+        )
+
+
+### END ###
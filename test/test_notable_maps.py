@@ -0,0 +1,113 @@
+"""
+TEST IDENTIFYING NOTABLE MAPS
+
+The vectorized id_notable_maps_from_ratings() must find the same notable maps
+as the loop it replaced, which scanned the maps in order and kept a map when
+better_map() said so -- including when ratings tie, when no maps qualify, and
+when the ensemble is empty.
+"""
+
+from typing import Any, List, Dict
+
+import random
+
+import numpy as np
+import pytest
+
+from rdaensemble.general.notable_maps import (
+    ratings_dimensions,
+    ratings_indexes,
+    id_notable_maps,
+    id_notable_maps_from_ratings,
+    qualifying_map,
+    better_map,
+)
+
+
+def loop_notable_maps(
+    scores: List[Dict[str, Any]], filters: List[int]
+) -> Dict[str, Any]:
+    """The notable maps, found the way id_notable_maps() used to find them."""
+
+    output: Dict[str, Any] = dict()
+    notable_maps: List[Dict[str, Any]] = [
+        {m: "None", "ratings": []} for m in ratings_dimensions
+    ]
+
+    total: int = 0
+    qualifying: int = 0
+
+    for s in scores:
+        total += 1
+        ratings: List[int] = [int(s[m]) for m in ratings_dimensions]
+        if not qualifying_map(ratings, filters):
+            continue
+
+        for d in ratings_indexes:
+            if better_map(ratings, notable_maps[d], d):
+                notable_maps[d][ratings_dimensions[d]] = s["map"]
+                notable_maps[d]["ratings"] = ratings
+
+        qualifying += 1
+
+    output["size"] = total
+    output["filters"] = filters
+    output["qualifying"] = qualifying
+    output["notable_maps"] = notable_maps
+
+    return output
+
+
+def random_scores(rng: random.Random, n: int, low: int, high: int) -> List[Dict]:
+    """Scores with ratings in a narrow range, so there are lots of ties."""
+
+    return [
+        {"map": f"{i:04d}", **{m: rng.randint(low, high) for m in ratings_dimensions}}
+        for i in range(n)
+    ]
+
+
+def from_ratings(scores: List[Dict[str, Any]], filters: List[int]) -> Dict[str, Any]:
+    names: List[str] = [s["map"] for s in scores]
+    ratings: np.ndarray = np.array(
+        [[s[m] for m in ratings_dimensions] for s in scores], dtype=np.int64
+    ).reshape(-1, len(ratings_dimensions))
+
+    return id_notable_maps_from_ratings(names, ratings, filters)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_notable_maps_match_loop(seed) -> None:
+    rng: random.Random = random.Random(seed)
+    low: int = rng.choice([0, 20, 95])
+    high: int = low + rng.choice([0, 1, 3, 5])
+    scores: List[Dict[str, Any]] = random_scores(rng, rng.randint(1, 200), low, high)
+    filters: List[int] = [rng.choice([0, 0, low, high]) for _ in ratings_dimensions]
+
+    expected: Dict[str, Any] = loop_notable_maps(scores, filters)
+
+    assert from_ratings(scores, filters) == expected
+    assert id_notable_maps(scores, filters) == expected
+
+
+def test_notable_maps_with_no_qualifying_maps() -> None:
+    scores: List[Dict[str, Any]] = random_scores(random.Random(1), 20, 10, 50)
+    filters: List[int] = [0, 0, 0, 0, 51]
+
+    expected: Dict[str, Any] = loop_notable_maps(scores, filters)
+
+    assert expected["qualifying"] == 0
+    assert from_ratings(scores, filters) == expected
+    assert id_notable_maps(scores, filters) == expected
+
+
+def test_notable_maps_of_empty_ensemble() -> None:
+    filters: List[int] = [0, 0, 0, 0, 0]
+
+    expected: Dict[str, Any] = loop_notable_maps([], filters)
+
+    assert from_ratings([], filters) == expected
+    assert id_notable_maps([], filters) == expected
+
+
+### END ###
@@ -0,0 +1,153 @@
+"""
+TEST RESUMING A RECOM CHAIN FROM A CHECKPOINT
+
+A chain killed after some plans and resumed from its last checkpoint must yield
+the same plans as a chain that was never stopped. The chain runs on a small grid,
+with both a starting plan (districts 1..N) and parts labelled 0..N-1, as in a
+random start, and is killed a few plans after a checkpoint, so the resumed chain
+also has to drop the plans written since.
+"""
+
+from typing import Any, List, Dict
+
+import os, random
+
+import networkx as nx
+import pytest
+
+from gerrychain import Graph, Election
+
+from rdaensemble.general import JSONLinesEnsembleWriter, read_ensemble
+from rdaensemble.mcmc import (
+    setup_unbiased_markov_chain,
+    run_unbiased_chain,
+    load_checkpoint,
+    checkpoint_plan,
+)
+
+SEED: int = 518
+N: int = 4
+KEEP: int = 30
+KILL_AFTER: int = 17
+CHECKPOINT_EVERY: int = 5
+
+
+class Killed(Exception):
+    pass
+
+
+class KillingSink:
+    """Write plans to a JSON Lines ensemble, and die after so many of them."""
+
+    def __init__(self, sink: JSONLinesEnsembleWriter, after: int) -> None:
+        self._sink: JSONLinesEnsembleWriter = sink
+        self._left: int = after
+
+    def write(self, plan: Dict[str, Any]) -> None:
+        if self._left == 0:
+            raise Killed()
+        self._left -= 1
+        self._sink.write(plan)
+
+    def flush(self) -> None:
+        self._sink.flush()
+
+    def close(self) -> None:
+        self._sink.close()
+
+
+def grid(initial: Dict[int, int], n: int = 12) -> Graph:
+    g: nx.Graph = nx.convert_node_labels_to_integers(
+        nx.grid_2d_graph(n, n), ordering="sorted"
+    )
+    for v in g.nodes:
+        g.nodes[v].update(
+            TOTAL_POP=100 + (v * 37) % 23,
+            COUNTY=f"{v // (3 * n):03d}",
+            REP_VOTES=40 + v % 7,
+            DEM_VOTES=50 + v % 5,
+            INITIAL=initial[v],
+        )
+
+    return Graph.from_networkx(g)
+
+
+def run(path: str, initial: Dict[int, int], random_start: bool, **kwargs) -> None:
+    """Set up a chain from the initial plan, and run it, as scripts/recom_ensemble.py does."""
+
+    resume: Any = kwargs.get("resume")
+    size: int = KEEP + 1 if resume is None else KEEP - resume["plans_kept"] + 1
+    random.seed(SEED)
+    elections: List[Election] = [
+        Election(
+            "election_composite",
+            {"Democratic": "DEM_VOTES", "Republican": "REP_VOTES"},
+        )
+    ]
+    chain, _ = setup_unbiased_markov_chain(
+        "congress", N, size, grid(initial), elections
+    )
+    back_map: Dict[int, str] = {v: f"{v:04d}" for v in initial}
+
+    sink: Any = kwargs.pop("sink")
+    with open(os.devnull, "w") as log:
+        try:
+            run_unbiased_chain(
+                chain,
+                back_map,
+                log,
+                keep=KEEP,
+                random_start=random_start,
+                sink=sink,
+                **kwargs,
+            )
+        finally:
+            sink.close()
+
+
+@pytest.mark.parametrize("random_start", [False, True])
+def test_resumed_chain_matches_uninterrupted_chain(tmp_path, random_start) -> None:
+    n: int = 12
+    offset: int = 0 if random_start else 1
+    initial: Dict[int, int] = {v: offset + ((v % n) * N) // n for v in range(n * n)}
+    metadata: Dict[str, Any] = {"size": KEEP}
+
+    whole: str = str(tmp_path / "whole.jsonl")
+    run(whole, initial, random_start, sink=JSONLinesEnsembleWriter(whole, metadata))
+
+    killed: str = str(tmp_path / "killed.jsonl")
+    checkpoint: str = str(tmp_path / "killed_checkpoint.json")
+    with pytest.raises(Killed):
+        run(
+            killed,
+            initial,
+            random_start,
+            sink=KillingSink(JSONLinesEnsembleWriter(killed, metadata), KILL_AFTER),
+            checkpoint=checkpoint,
+            checkpoint_every=CHECKPOINT_EVERY,
+        )
+
+    resume: Dict[str, Any] = load_checkpoint(checkpoint)
+    assert resume["plans_kept"] == KILL_AFTER - KILL_AFTER % CHECKPOINT_EVERY
+    restart: Dict[int, int] = {
+        int(row["GEOID"]): int(row["DISTRICT"]) for row in checkpoint_plan(resume)
+    }
+    run(
+        killed,
+        restart,
+        False,
+        sink=JSONLinesEnsembleWriter(
+            killed, metadata, append_after=resume["plans_kept"]
+        ),
+        checkpoint=checkpoint,
+        checkpoint_every=CHECKPOINT_EVERY,
+        resume=resume,
+    )
+
+    expected: List[Dict[str, Any]] = read_ensemble(whole)["plans"]
+    actual: List[Dict[str, Any]] = read_ensemble(killed)["plans"]
+    assert len(expected) == KEEP
+    assert actual == expected
+
+
+### END ###
@@ -0,0 +1,71 @@
+"""
+TEST THE SCORE CACHE FINGERPRINT
+
+The fingerprint of the scoring inputs must be the same in every process, or the
+on-disk cache never hits across runs. So it's computed in subprocesses with
+different string hash seeds, with metadata built from a set of counties the
+way load_metadata() builds it.
+"""
+
+import os, sys, subprocess
+
+from rdaensemble.general import score_cache
+
+SCRIPT: str = """
+from rdaensemble.general.score_cache import inputs_fingerprint
+
+geoids = [f"37{c:03d}{p:06d}" for c in range(1, 40, 2) for p in range(3)]
+counties = set(geoid[2:5] for geoid in geoids)
+data = {g: {"GEOID": g, "TOTAL_POP": i} for i, g in enumerate(geoids)}
+graph = {g: [h for h in geoids if h != g][:3] for g in geoids}
+shapes = {g: {"center": [1.0, 2.0], "area": 3.0, "arcs": {"OUT_OF_STATE": 1.0}, "exterior": [[0.0, 1.0]]} for g in geoids}
+metadata = {
+    "C": len(counties),
+    "D": 3,
+    "county_to_index": {county: i for i, county in enumerate(counties)},
+    "district_to_index": {d: i for i, d in enumerate(range(1, 4))},
+}
+print(inputs_fingerprint(data, shapes, graph, metadata, metrics=["partisan"]).hex())
+"""
+
+
+def fingerprint(hash_seed: str) -> str:
+    root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env: dict = dict(os.environ, PYTHONHASHSEED=hash_seed)
+    env["PYTHONPATH"] = os.pathsep.join([root, env.get("PYTHONPATH", "")])
+
+    return subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+def test_fingerprint_is_stable_across_hash_seeds() -> None:
+    fingerprints: set[str] = set(fingerprint(seed) for seed in ["0", "1", "2", "3"])
+
+    assert len(fingerprints) == 1
+
+
+
+def test_fingerprint_depends_on_more_scores_package_version(monkeypatch) -> None:
+    def add_scores(*args) -> dict:
+        return dict()
+
+    add_scores.__module__ = "rdaei.analyze"  # Where the EI scores come from
+    inputs: list = [{"a": {"TOTAL_POP": 1}}, {}, {}, {"D": 1}, {"votes": [1]}]
+
+    def fingerprint_with(rdaei_version: str) -> bytes:
+        versions: dict = {"rdaei": rdaei_version}
+        monkeypatch.setattr(
+            score_cache, "package_version", lambda p: versions.get(p, "1.0")
+        )
+        return score_cache.inputs_fingerprint(*inputs, more_scores_fn=add_scores)
+
+    assert fingerprint_with("0.3.0") == fingerprint_with("0.3.0")
+    assert fingerprint_with("0.3.0") != fingerprint_with("0.4.0")
+
+
+### END ###
@@ -0,0 +1,112 @@
+"""
+TEST POPULATION COMPACTNESS (ENERGY) ON PLAN VECTORS
+
+calc_energy_vector() and calc_energies() must give the energy that rdabase's
+calc_energy() computes for the same plan, one plan or a batch at a time --
+including a plan in a batch whose highest district is below the batch's.
+"""
+
+from typing import List, Dict
+
+import random
+
+import numpy as np
+import pytest
+
+from rdabase import Point, calc_energy
+from rdabase.energy import LatLong, index_assignments, index_geoids, index_points
+
+from rdaensemble.general import (
+    make_plan,
+    PlanIndex,
+    district_vector,
+    calc_energy_vector,
+    calc_energies,
+)
+
+NPRECINCTS: int = 300
+
+
+def random_points(rng: random.Random) -> List[Point]:
+    """Precincts scattered over a state, with very unequal populations."""
+
+    return [
+        Point(
+            f"37{i:09d}",
+            rng.choice([0.01, rng.uniform(1, 100), rng.uniform(100, 5000)]),
+            LatLong(rng.uniform(33.8, 36.6), rng.uniform(-84.3, -75.5)),
+        )
+        for i in range(NPRECINCTS)
+    ]
+
+
+def random_plan(
+    rng: random.Random, points: List[Point], n: int
+) -> Dict[str, int | str]:
+    """A plan with districts 1 to n, none empty, in a shuffled precinct order."""
+
+    districts: List[int] = list(range(1, n + 1)) + [
+        rng.randint(1, n) for _ in range(len(points) - n)
+    ]
+    rng.shuffle(districts)
+    plan: Dict[str, int | str] = {p.geoid: d for p, d in zip(points, districts)}
+    items = list(plan.items())
+    rng.shuffle(items)
+
+    return dict(items)
+
+
+def reference_energy(plan: Dict[str, int | str], points: List[Point]) -> float:
+    """The energy of a plan as the scoring code computed it before plan vectors."""
+
+    pop_by_geoid: Dict[str, float] = {p.geoid: p.pop for p in points}
+    indexed = index_assignments(make_plan(plan), index_geoids(points), pop_by_geoid)
+
+    return calc_energy(indexed, index_points(points))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_energy_vector_matches_calc_energy(seed) -> None:
+    rng: random.Random = random.Random(seed)
+    points: List[Point] = random_points(rng)
+    index: PlanIndex = PlanIndex(points)
+
+    for n in [1, 2, 7, 14]:
+        plan: Dict[str, int | str] = random_plan(rng, points, n)
+        energy: float = calc_energy_vector(district_vector(plan, index), index)
+
+        assert energy == pytest.approx(reference_energy(plan, points), rel=1e-9)
+
+
+def test_batched_energies_match_calc_energy() -> None:
+    rng: random.Random = random.Random(518)
+    points: List[Point] = random_points(rng)
+    index: PlanIndex = PlanIndex(points)
+
+    # The middle plan's highest district is below the batch's highest district
+    plans: List[Dict[str, int | str]] = [
+        random_plan(rng, points, n) for n in [8, 3, 8, 5]
+    ]
+    batch: np.ndarray = np.stack([district_vector(p, index) for p in plans])
+    energies: np.ndarray = calc_energies(batch, index.lats, index.longs, index.pops)
+
+    assert energies.shape == (len(plans),)
+    for plan, energy in zip(plans, energies):
+        assert energy == pytest.approx(reference_energy(plan, points), rel=1e-9)
+        assert energy == calc_energy_vector(district_vector(plan, index), index)
+
+
+def test_energies_reject_empty_districts() -> None:
+    rng: random.Random = random.Random(7)
+    points: List[Point] = random_points(rng)
+    index: PlanIndex = PlanIndex(points)
+
+    plan: Dict[str, int | str] = random_plan(rng, points, 4)
+    districts: np.ndarray = district_vector(plan, index)
+    districts[districts == 2] = 1  # No precincts in district 2
+
+    with pytest.raises(ValueError):
+        calc_energy_vector(districts, index)
+
+
+### END ###